@@ -100,11 +100,11 @@ private func calculateWaterLevelDifference(for lakeName: String, currentLevel: S
         "Zürichsee": 405.94,
         "Vierwaldstättersee": 433.57,
         "Bodensee": 395.60,
-        "Genfersee": 372.05,
+        "Lac Léman": 372.05,
         "Thunersee": 557.66,
         "Brienzersee": 563.77,
         "Lago Maggiore": 193.49,
-        "Luganersee": 270.47,
+        "Lago di Lugano": 270.47,
         "Bielersee": 429.25,
         "Neuenburgersee": 429.29,
         "Murtensee": 429.30,
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for check_stations_consistency.py on synthetic station data and Swift trees.
+
+Usage:
+    python3 scripts/benchmark_stations_consistency.py --output bench.json
+    python3 scripts/benchmark_stations_consistency.py --baseline bench.json --output bench-new.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import check_stations_consistency as consistency
+
+BENCHMARK_VERSION = 1
+DEFAULT_STATION_COUNTS = [1000, 10000, 100000, 500000]
+DEFAULT_FILE_COUNTS = [100, 1000, 20000]
+DEFAULT_HARDCODED = 200
+
+# Roughly the area the Swiss lakes cover
+LATITUDE_RANGE = (45.8, 47.8)
+LONGITUDE_RANGE = (6.0, 10.5)
+
+def synthetic_station_name(i):
+    """Deterministic station name for station number ``i``."""
+    return f"Station {i:06d} (See)"
+
+def synthetic_uic_ref(i):
+    return str(8500000 + i)
+
+def generate_stations_json(path, station_count, lake_count=16, string_only_ratio=0.05, seed=0):
+    """Write a stations.json with ``station_count`` stations spread over ``lake_count`` lakes.
+
+    A ``string_only_ratio`` share of the stations are bare name strings, the
+    rest are full objects with UIC ref and coordinates.
+    """
+    rng = random.Random(seed)
+    per_lake, remainder = divmod(station_count, lake_count)
+    lakes = []
+    i = 0
+    for lake in range(lake_count):
+        stations = []
+        for _ in range(per_lake + (1 if lake < remainder else 0)):
+            if rng.random() < string_only_ratio:
+                stations.append(synthetic_station_name(i))
+            else:
+                stations.append({
+                    'name': synthetic_station_name(i),
+                    'uic_ref': synthetic_uic_ref(i),
+                    'coordinates': {
+                        'latitude': round(rng.uniform(*LATITUDE_RANGE), 6),
+                        'longitude': round(rng.uniform(*LONGITUDE_RANGE), 6)
+                    }
+                })
+            i += 1
+        lakes.append({'name': f"Lake {lake:03d}", 'operators': [f"OP{lake:03d}"], 'stations': stations})
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'lakes': lakes}, f, ensure_ascii=False)
+
+def _swift_station_literal(rng, station_count):
+    # Mostly stations that exist in the dataset, some that do not
+    i = rng.randrange(int(station_count * 1.1) + 1)
+    return (
+        f'        StationData(id: "{i}", name: "{synthetic_station_name(i)}", '
+        f'latitude: {rng.uniform(*LATITUDE_RANGE):.6f}, longitude: {rng.uniform(*LONGITUDE_RANGE):.6f}, '
+        f'uic_ref: "{synthetic_uic_ref(i)}")'
+    )
+
+def generate_swift_tree(directory, file_count, density=0.05, station_count=1000, files_per_dir=50, seed=0):
+    """Write ``file_count`` Swift files below ``directory``.
+
+    A ``density`` share of the files contain StationData(...) literals that
+    refer to stations of a dataset with ``station_count`` stations; the rest
+    are filler code.
+    """
+    rng = random.Random(seed)
+    for n in range(file_count):
+        subdir = Path(directory) / f"Module{n // files_per_dir:04d}"
+        subdir.mkdir(parents=True, exist_ok=True)
+        lines = ["import Foundation", "", f"struct Generated{n} {{"]
+        lines.extend(f"    let value{k} = {rng.randint(0, 1000)}" for k in range(rng.randint(10, 60)))
+        if rng.random() < density:
+            lines.append("    static let stations = [")
+            lines.extend(_swift_station_literal(rng, station_count) + "," for _ in range(rng.randint(1, 5)))
+            lines.append("    ]")
+        lines.append("}")
+        (subdir / f"Generated{n}.swift").write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+def generate_hardcoded_stations(count, station_count, seed=0):
+    """Hardcoded station dicts as find_hardcoded_stations_in_code returns them.
+
+    The literals refer to a dataset with ``station_count`` stations, so most
+    of them match and about one in eleven is unknown.
+    """
+    rng = random.Random(seed)
+    literals = [_swift_station_literal(rng, station_count) for _ in range(count)]
+    return [
+        {
+            'id': match[0],
+            'name': match[1],
+            'latitude': float(match[2]),
+            'longitude': float(match[3]),
+            'uic_ref': match[4] if match[4] else None,
+            'file': f"Generated{n}.swift"
+        }
+        for n, match in enumerate(consistency.STATION_PATTERN.findall('\n'.join(literals)))
+    ]
+
+def measure(func, repeat=1):
+    """Run ``func`` and return (result, best_seconds, peak_bytes).
+
+    Timing runs happen without tracemalloc; one extra run measures the peak
+    of Python allocations. Work done in child processes is not included in
+    the peak.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+def run_benchmarks(work_dir, station_counts, file_counts, lake_count, string_only_ratio, density, hardcoded_count,
+                   repeat, seed):
+    results = {}
+
+    def record(name, seconds, peak_bytes, **extra):
+        results[name] = {'seconds': round(seconds, 6), 'peak_bytes': peak_bytes, **extra}
+        print(f"   • {name}: {seconds * 1000:.1f} ms, peak {peak_bytes / 1e6:.1f} MB")
+
+    max_stations = max(station_counts)
+    for file_count in file_counts:
+        tree = Path(work_dir) / f"swift-{file_count}"
+        generate_swift_tree(tree, file_count, density=density, station_count=max_stations, seed=seed)
+
+        found, seconds, peak = measure(lambda: consistency.find_hardcoded_stations_in_code(tree, workers=1), repeat)
+        record(f"find_hardcoded_stations_in_code[files={file_count},workers=1]", seconds, peak, matches=len(found))
+
+        _, seconds, peak = measure(lambda: consistency.find_hardcoded_stations_in_code(tree), repeat)
+        record(f"find_hardcoded_stations_in_code[files={file_count},workers=auto]", seconds, peak, matches=len(found))
+
+        cache = consistency.load_scan_cache(None)
+        consistency.find_hardcoded_stations_in_code(tree, cache=cache)
+        _, seconds, peak = measure(lambda: consistency.find_hardcoded_stations_in_code(tree, cache=cache), repeat)
+        record(f"find_hardcoded_stations_in_code[files={file_count},cache=warm]", seconds, peak, matches=len(found))
+
+    for station_count in station_counts:
+        json_path = Path(work_dir) / f"stations-{station_count}.json"
+        generate_stations_json(json_path, station_count, lake_count=lake_count,
+                               string_only_ratio=string_only_ratio, seed=seed)
+
+        table, seconds, peak = measure(lambda: consistency.load_stations_from_json(json_path), repeat)
+        record(f"load_stations_from_json[stations={station_count}]", seconds, peak,
+               file_bytes=json_path.stat().st_size)
+
+        # Literals generated for this dataset, so compare measures matching
+        # rather than the nearest/suggestion path for unknown stations
+        hardcoded = generate_hardcoded_stations(hardcoded_count, station_count, seed=seed)
+
+        def compare():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return consistency.compare_stations(table, hardcoded)
+        _, seconds, peak = measure(compare, repeat)
+        record(f"compare_stations[stations={station_count}]", seconds, peak, hardcoded=len(hardcoded))
+
+        json_path.unlink()
+
+    return results
+
+def compare_with_baseline(results, baseline, threshold, min_delta=0.0):
+    """Return (name, baseline_seconds, seconds) for benchmarks slower than ``threshold`` × baseline.
+
+    Slowdowns of less than ``min_delta`` seconds are treated as noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or previous['seconds'] <= 0:
+            continue
+        if result['seconds'] > previous['seconds'] * threshold and result['seconds'] - previous['seconds'] >= min_delta:
+            regressions.append((name, previous['seconds'], result['seconds']))
+    return regressions
+
+def parse_counts(value):
+    return [int(v) for v in value.split(',') if v]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark check_stations_consistency.py on synthetic data.")
+    parser.add_argument('--stations', type=parse_counts, default=DEFAULT_STATION_COUNTS,
+                        help="Comma-separated station counts (default: 1000,10000,100000,500000)")
+    parser.add_argument('--files', type=parse_counts, default=DEFAULT_FILE_COUNTS,
+                        help="Comma-separated Swift file counts (default: 100,1000,20000)")
+    parser.add_argument('--lakes', type=int, default=16, help="Number of lakes in the synthetic datasets")
+    parser.add_argument('--string-only-ratio', type=float, default=0.05,
+                        help="Share of stations written as bare name strings")
+    parser.add_argument('--density', type=float, default=0.05,
+                        help="Share of Swift files containing StationData literals")
+    parser.add_argument('--hardcoded', type=int, default=DEFAULT_HARDCODED,
+                        help="Hardcoded stations compared against each dataset")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing runs per benchmark (best is kept)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', type=Path, default=None,
+                        help="Keep generated data in this directory instead of a temporary one")
+    parser.add_argument('--output', type=Path, default=None, help="Write results as JSON to this file")
+    parser.add_argument('--baseline', type=Path, default=None, help="Results file of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Slowdown factor against the baseline that counts as a regression")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help="Smallest absolute slowdown that counts as a regression")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=== STATION CONSISTENCY BENCHMARKS ===\n")
+    if args.work_dir:
+        args.work_dir.mkdir(parents=True, exist_ok=True)
+        work = contextlib.nullcontext(str(args.work_dir))
+    else:
+        work = tempfile.TemporaryDirectory(prefix="stations-bench-")
+    with work as work_dir:
+        results = run_benchmarks(work_dir, args.stations, args.files, args.lakes,
+                                 args.string_only_ratio, args.density, args.hardcoded, args.repeat, args.seed)
+
+    report = {
+        'version': BENCHMARK_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': consistency.np.__version__ if consistency.np is not None else None
+        },
+        'parameters': {
+            'stations': args.stations,
+            'files': args.files,
+            'lakes': args.lakes,
+            'string_only_ratio': args.string_only_ratio,
+            'density': args.density,
+            'hardcoded': args.hardcoded,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"\n❌ Slower than {args.threshold}× (and {args.min_delta_ms} ms) the baseline:")
+            for name, before, after in regressions:
+                print(f"   • {name}: {before * 1000:.1f} ms → {after * 1000:.1f} ms")
+            return False
+        print(f"\n✅ No benchmark slower than {args.threshold}× (and {args.min_delta_ms} ms) the baseline")
+
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
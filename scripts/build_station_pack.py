@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Compile stations.json into a compact binary station pack and verify it.
+
+The pack is what the apps can map at startup instead of JSON-decoding and
+flattening stations.json on every launch. Layout (all little-endian):
+
+    header      magic "NWSP", format version, header size, station count,
+                lake count, CRC32 of everything after the header, SHA-256 of
+                the source JSON, then (offset, size) for each section
+    strings     UTF-8 string table; identical strings are stored once
+    lakes       name ref, operator count, first operator, first row, row count
+    operators   string refs of all lake operators
+    stations    name ref, lake id, UIC ref string ref (length 0 = no UIC ref)
+    coordinates int32 latitudes, then int32 longitudes, in 1e-7 degrees;
+                INT32_MIN marks a station without coordinates
+    uic_index   station rows sorted by UIC ref bytes, for binary search
+    name_index  slot count, then open-addressing slots (row + 1, 0 = empty)
+                keyed by FNV-1a 32 of the UTF-8 name, linear probing
+
+Stations keep their order from stations.json, so each lake is a contiguous
+row range.
+
+Usage:
+    python3 scripts/build_station_pack.py --output stations.pack
+    python3 scripts/build_station_pack.py --output stations.pack --check
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import struct
+import sys
+import time
+import zlib
+from array import array
+from pathlib import Path
+
+PACK_MAGIC = b'NWSP'
+PACK_VERSION = 1
+SECTIONS = ('strings', 'lakes', 'operators', 'stations', 'coordinates', 'uic_index', 'name_index')
+HEADER_FORMAT = '<4sHHIII32s' + 'II' * len(SECTIONS)
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+LAKE_RECORD = struct.Struct('<IHHIII')
+STRING_REF = struct.Struct('<IHxx')
+STATION_RECORD = struct.Struct('<IHHIHxx')
+
+COORDINATE_SCALE = 10_000_000
+MISSING_COORDINATE = -2 ** 31
+
+def fnv1a_32(data):
+    """FNV-1a 32-bit hash of a bytes object."""
+    h = 0x811C9DC5
+    for byte in data:
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+def _le_array(typecode, values=()):
+    """array converted between host and little-endian order (a byteswap is its own inverse)."""
+    a = array(typecode, values)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a
+
+def _pad4(blob):
+    return blob + b'\0' * (-len(blob) % 4)
+
+class _StringTable:
+    def __init__(self):
+        self.blob = bytearray()
+        self.offsets = {}
+
+    def ref(self, value):
+        """(offset, length) of a string, adding it on first use."""
+        data = value.encode('utf-8')
+        if len(data) > 0xFFFF:
+            raise ValueError(f"String too long for the pack: {value[:40]}…")
+        if data not in self.offsets:
+            self.offsets[data] = len(self.blob)
+            self.blob += data
+        return self.offsets[data], len(data)
+
+def _encode_coordinate(value, label):
+    encoded = round(value * COORDINATE_SCALE)
+    if not -2 ** 31 < encoded < 2 ** 31:
+        raise ValueError(f"{label}: coordinate {value} out of range")
+    return encoded
+
+def build_station_pack(data, source_sha256=b'\0' * 32):
+    """Encode a parsed stations.json document as pack bytes."""
+    strings = _StringTable()
+    lakes = bytearray()
+    operators = bytearray()
+    stations = bytearray()
+    latitudes = array('i')
+    longitudes = array('i')
+    uic_rows = []
+    names = []
+
+    operator_count = 0
+    for lake_id, lake in enumerate(data['lakes']):
+        if lake_id > 0xFFFF:
+            raise ValueError("Too many lakes for the pack format")
+        first_row = len(names)
+        for operator in lake.get('operators', []):
+            operators += STRING_REF.pack(*strings.ref(operator))
+        for station in lake['stations']:
+            if isinstance(station, str):
+                station = {'name': station}
+            name = station['name']
+            uic_ref = station.get('uic_ref') or None
+            coordinates = station.get('coordinates')
+            row = len(names)
+            name_offset, name_length = strings.ref(name)
+            uic_offset, uic_length = strings.ref(uic_ref) if uic_ref else (0, 0)
+            stations += STATION_RECORD.pack(name_offset, name_length, lake_id, uic_offset, uic_length)
+            if coordinates:
+                latitudes.append(_encode_coordinate(coordinates['latitude'], name))
+                longitudes.append(_encode_coordinate(coordinates['longitude'], name))
+            else:
+                latitudes.append(MISSING_COORDINATE)
+                longitudes.append(MISSING_COORDINATE)
+            if uic_ref:
+                uic_rows.append((uic_ref.encode('utf-8'), row))
+            names.append(name.encode('utf-8'))
+        lake_operators = len(lake.get('operators', []))
+        name_offset, name_length = strings.ref(lake['name'])
+        lakes += LAKE_RECORD.pack(name_offset, name_length, lake_operators, operator_count,
+                                  first_row, len(names) - first_row)
+        operator_count += lake_operators
+
+    if sys.byteorder == 'big':
+        latitudes.byteswap()
+        longitudes.byteswap()
+    coordinates_blob = latitudes.tobytes() + longitudes.tobytes()
+    if sys.byteorder == 'big':
+        latitudes.byteswap()
+        longitudes.byteswap()
+
+    uic_index = _le_array('I', (row for _, row in sorted(uic_rows)))
+
+    slot_count = 1
+    while slot_count < 2 * max(len(names), 1):
+        slot_count *= 2
+    slots = [0] * slot_count
+    for row, name in enumerate(names):
+        slot = fnv1a_32(name) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = row + 1
+    name_index = _le_array('I', [slot_count] + slots)
+
+    section_blobs = [
+        _pad4(bytes(strings.blob)),
+        bytes(lakes),
+        bytes(operators),
+        bytes(stations),
+        coordinates_blob,
+        uic_index.tobytes(),
+        name_index.tobytes(),
+    ]
+    sections = []
+    offset = HEADER_SIZE
+    for blob in section_blobs:
+        sections.extend((offset, len(blob)))
+        offset += len(blob)
+    body = b''.join(section_blobs)
+
+    header = struct.pack(HEADER_FORMAT, PACK_MAGIC, PACK_VERSION, HEADER_SIZE,
+                         len(names), len(data['lakes']), zlib.crc32(body), source_sha256, *sections)
+    return header + body
+
+class StationPack:
+    """Read-only view over station pack bytes."""
+
+    def __init__(self, data, verify=True):
+        if len(data) < HEADER_SIZE:
+            raise ValueError("Station pack is truncated")
+        fields = struct.unpack_from(HEADER_FORMAT, data)
+        magic, version, header_size, station_count, lake_count, crc, source_sha256 = fields[:7]
+        if magic != PACK_MAGIC:
+            raise ValueError("Not a station pack")
+        if version != PACK_VERSION:
+            raise ValueError(f"Unsupported station pack version {version}")
+        if verify and zlib.crc32(memoryview(data)[header_size:]) != crc:
+            raise ValueError("Station pack checksum mismatch")
+
+        self.data = bytes(data)
+        self.station_count = station_count
+        self.lake_count = lake_count
+        self.source_sha256 = source_sha256.hex()
+        self.sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, size = fields[7 + 2 * i], fields[8 + 2 * i]
+            if offset + size > len(self.data):
+                raise ValueError(f"Station pack section {name} is truncated")
+            self.sections[name] = (offset, size)
+
+        coordinates = self._section_array('i', 'coordinates')
+        self.latitudes = coordinates[:station_count]
+        self.longitudes = coordinates[station_count:]
+        self.uic_index = self._section_array('I', 'uic_index')
+        name_index = self._section_array('I', 'name_index')
+        self.name_slots = name_index[1:]
+
+    def _section_array(self, typecode, section):
+        offset, size = self.sections[section]
+        return _le_array(typecode, memoryview(self.data)[offset:offset + size].cast(typecode))
+
+    def _string(self, offset, length):
+        start = self.sections['strings'][0] + offset
+        return self.data[start:start + length].decode('utf-8')
+
+    def _station(self, row):
+        return STATION_RECORD.unpack_from(self.data, self.sections['stations'][0] + row * STATION_RECORD.size)
+
+    def __len__(self):
+        return self.station_count
+
+    def name(self, row):
+        name_offset, name_length, _, _, _ = self._station(row)
+        return self._string(name_offset, name_length)
+
+    def uic_ref(self, row):
+        _, _, _, uic_offset, uic_length = self._station(row)
+        return self._string(uic_offset, uic_length) if uic_length else None
+
+    def lake_id(self, row):
+        return self._station(row)[2]
+
+    def coordinates(self, row):
+        """(latitude, longitude) of a station, or None."""
+        latitude = self.latitudes[row]
+        if latitude == MISSING_COORDINATE:
+            return None
+        return latitude / COORDINATE_SCALE, self.longitudes[row] / COORDINATE_SCALE
+
+    def lake(self, lake_id):
+        """Dict with name, operators and the row range of one lake."""
+        name_offset, name_length, operator_count, operator_first, first_row, row_count = \
+            LAKE_RECORD.unpack_from(self.data, self.sections['lakes'][0] + lake_id * LAKE_RECORD.size)
+        operators_offset = self.sections['operators'][0]
+        operators = [
+            self._string(*STRING_REF.unpack_from(self.data, operators_offset + i * STRING_REF.size))
+            for i in range(operator_first, operator_first + operator_count)
+        ]
+        return {
+            'name': self._string(name_offset, name_length),
+            'operators': operators,
+            'rows': range(first_row, first_row + row_count)
+        }
+
+    def find_by_name(self, name):
+        """Row of the first station with this exact name, or None."""
+        encoded = name.encode('utf-8')
+        mask = len(self.name_slots) - 1
+        slot = fnv1a_32(encoded) & mask
+        while self.name_slots[slot]:
+            row = self.name_slots[slot] - 1
+            if self.name(row) == name:
+                return row
+            slot = (slot + 1) & mask
+        return None
+
+    def find_by_uic(self, uic_ref):
+        """Row of the first station (in file order) with this UIC ref, or None."""
+        key = uic_ref.encode('utf-8')
+        lo, hi = 0, len(self.uic_index)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.uic_ref(self.uic_index[mid]).encode('utf-8') < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.uic_index) and self.uic_ref(self.uic_index[lo]) == uic_ref:
+            return self.uic_index[lo]
+        return None
+
+def verify_station_pack(pack, data):
+    """Round-trip every lake and station of the source document through the pack.
+
+    Returns a list of problems; an empty list means the pack is faithful.
+    """
+    problems = []
+    if pack.lake_count != len(data['lakes']):
+        problems.append(f"lake count {pack.lake_count} != {len(data['lakes'])}")
+        return problems
+
+    row = 0
+    first_by_name = {}
+    first_by_uic = {}
+    for lake_id, lake in enumerate(data['lakes']):
+        packed_lake = pack.lake(lake_id)
+        if packed_lake['name'] != lake['name'] or packed_lake['operators'] != lake.get('operators', []):
+            problems.append(f"lake {lake['name']}: name or operators differ")
+        if packed_lake['rows'].start != row or len(packed_lake['rows']) != len(lake['stations']):
+            problems.append(f"lake {lake['name']}: row range differs")
+        for station in lake['stations']:
+            if isinstance(station, str):
+                station = {'name': station}
+            label = f"{lake['name']}/{station['name']}"
+            if row >= len(pack):
+                problems.append(f"{label}: missing from pack")
+                return problems
+            if pack.name(row) != station['name']:
+                problems.append(f"{label}: name {pack.name(row)!r}")
+            if pack.uic_ref(row) != (station.get('uic_ref') or None):
+                problems.append(f"{label}: UIC ref {pack.uic_ref(row)!r}")
+            if pack.lake_id(row) != lake_id:
+                problems.append(f"{label}: lake id {pack.lake_id(row)}")
+            coordinates = station.get('coordinates')
+            # Coordinates are stored rounded to 1e-7°; compare them at that precision
+            expected = (
+                (_encode_coordinate(coordinates['latitude'], label), _encode_coordinate(coordinates['longitude'], label))
+                if coordinates else (MISSING_COORDINATE, MISSING_COORDINATE)
+            )
+            if (pack.latitudes[row], pack.longitudes[row]) != expected:
+                problems.append(f"{label}: coordinates {pack.coordinates(row)} != "
+                                f"{(coordinates['latitude'], coordinates['longitude']) if coordinates else None}")
+            first_by_name.setdefault(station['name'], row)
+            if station.get('uic_ref'):
+                first_by_uic.setdefault(station['uic_ref'], row)
+            row += 1
+
+    if row != len(pack):
+        problems.append(f"station count {len(pack)} != {row}")
+    for name, expected_row in first_by_name.items():
+        if pack.find_by_name(name) != expected_row:
+            problems.append(f"name index: {name!r} resolves to {pack.find_by_name(name)}")
+    for uic_ref, expected_row in first_by_uic.items():
+        found = pack.find_by_uic(uic_ref)
+        if found is None or pack.uic_ref(found) != uic_ref:
+            problems.append(f"UIC index: {uic_ref!r} resolves to {found}")
+    if pack.find_by_name("\0not a station\0") is not None:
+        problems.append("name index: lookup of an unknown name succeeded")
+    return problems
+
+def _best_time(func, repeat):
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _decode_json(raw):
+    # Mirrors what the apps do at startup: decode, then flatten stations with coordinates
+    data = json.loads(raw)
+    return [
+        (s['name'], s.get('uic_ref'), s['coordinates']['latitude'], s['coordinates']['longitude'])
+        for lake in data['lakes'] for s in lake['stations']
+        if isinstance(s, dict) and s.get('coordinates')
+    ]
+
+def _decode_pack(raw):
+    pack = StationPack(raw)
+    strings_offset, strings_size = pack.sections['strings']
+    strings = raw[strings_offset:strings_offset + strings_size]
+    stations_offset, stations_size = pack.sections['stations']
+    records = STATION_RECORD.iter_unpack(memoryview(raw)[stations_offset:stations_offset + stations_size])
+    return [
+        (
+            strings[name_offset:name_offset + name_length].decode('utf-8'),
+            strings[uic_offset:uic_offset + uic_length].decode('utf-8') if uic_length else None,
+            latitude / COORDINATE_SCALE,
+            longitude / COORDINATE_SCALE
+        )
+        for (name_offset, name_length, _, uic_offset, uic_length), latitude, longitude
+        in zip(records, pack.latitudes, pack.longitudes)
+        if latitude != MISSING_COORDINATE
+    ]
+
+def parse_args(argv=None):
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Compile stations.json into a binary station pack.")
+    parser.add_argument('--input', type=Path, default=script_dir.parent / "Next Wave" / "Data" / "stations.json",
+                        help="Source stations.json (default: Next Wave/Data/stations.json)")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="Where to write the pack; without it the pack is only built and verified")
+    parser.add_argument('--check', action='store_true',
+                        help="Verify the existing pack at --output against the source instead of writing it")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per decode timing (best is kept)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not args.input.exists():
+        print(f"❌ stations.json not found at {args.input}")
+        return False
+
+    raw = args.input.read_bytes()
+    data = json.loads(raw)
+    source_sha256 = hashlib.sha256(raw).digest()
+
+    print("=== STATION PACK ===\n")
+    if args.check:
+        if not args.output or not args.output.exists():
+            print(f"❌ No station pack to check at {args.output}")
+            return False
+        pack_bytes = args.output.read_bytes()
+        try:
+            pack = StationPack(pack_bytes)
+        except ValueError as e:
+            print(f"❌ {args.output}: {e}")
+            return False
+        if pack.source_sha256 != source_sha256.hex():
+            print(f"❌ {args.output} was built from a different stations.json; rebuild it")
+            return False
+    else:
+        pack_bytes = build_station_pack(data, source_sha256)
+        pack = StationPack(pack_bytes)
+    problems = verify_station_pack(pack, data)
+    if problems:
+        print("❌ Station pack does not round-trip:")
+        for problem in problems[:50]:
+            print(f"   • {problem}")
+        if len(problems) > 50:
+            print(f"   … and {len(problems) - 50} more")
+        return False
+    print(f"✅ Round-trip verified: {pack.station_count} stations in {pack.lake_count} lakes")
+
+    json_seconds = _best_time(lambda: _decode_json(raw), args.repeat)
+    pack_seconds = _best_time(lambda: _decode_pack(pack_bytes), args.repeat)
+    print(f"\n📦 Size:   JSON {len(raw):,} B (gzip {len(gzip.compress(raw)):,} B) → "
+          f"pack {len(pack_bytes):,} B (gzip {len(gzip.compress(pack_bytes)):,} B)")
+    print(f"⏱️  Decode: JSON {json_seconds * 1000:.2f} ms → pack {pack_seconds * 1000:.2f} ms "
+          f"(Python, best of {args.repeat})")
+
+    if args.output and not args.check:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_bytes(pack_bytes)
+        print(f"\n💾 Wrote {args.output}")
+
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
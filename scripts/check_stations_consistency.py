@@ -3,74 +3,693 @@
 Script to check consistency between stations.json and any hardcoded stations in the codebase.
 """
 
+import argparse
+import bisect
+import cProfile
+import datetime
+import hashlib
+import heapq
 import json
+import math
+import pstats
 import re
 import os
+import time
+import tracemalloc
+import unicodedata
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
-def load_stations_from_json(json_path):
-    """Load all stations from the JSON file."""
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    stations = []
+try:
+    import numpy as np
+except ImportError:
+    # NumPy only speeds up the coordinate checks; everything works without it
+    np = None
+
+# Matches StationData(id: ..., name: ..., latitude: ..., longitude: ..., uic_ref: ...) literals
+STATION_PATTERN = re.compile(
+    r'StationData\s*\(\s*id:\s*"([^"]+)",\s*name:\s*"([^"]+)",\s*latitude:\s*([\d.-]+),\s*longitude:\s*([\d.-]+),\s*uic_ref:\s*"([^"]*)"?\s*\)',
+    re.MULTILINE
+)
+# Cheap substring check so files without any StationData literal never hit the regex
+STATION_PREFILTER = b'StationData'
+
+# Bump when the cache layout or the pattern semantics change
+SCAN_CACHE_VERSION = 1
+# Below this many files to read, process startup costs more than it saves.
+# Serial scanning runs at roughly 40-50k files/s, while starting a spawn-based
+# pool (the macOS default) takes 0.2-1.8 s, so only very large trees gain.
+PARALLEL_SCAN_THRESHOLD = 20000
+
+# Allowed lat/lon difference between hardcoded and JSON coordinates
+COORDINATE_TOLERANCE_DEG = 0.001
+EARTH_RADIUS_M = 6371000.0
+# Grid cell edge for the station index (~5.5 km north-south)
+GRID_CELL_DEG = 0.05
+# Stations closer than this are reported as near-coincident
+NEAR_COINCIDENT_M = 25.0
+# Minimum trigram similarity for a name suggestion
+NAME_SUGGESTION_MIN_SCORE = 0.3
+# Trigrams in more than this share of names (and at least this many) only count when rescoring
+COMMON_TRIGRAM_SHARE = 0.05
+COMMON_TRIGRAM_MIN_ROWS = 100
+SUGGESTION_SHORTLIST_FACTOR = 10
+NEAREST_LOOKUP_VERSION = 1
+
+# Every target bundles its own copy of the station data; the first one is the reference
+STATIONS_JSON_COPIES = [
+    Path("Next Wave") / "Data" / "stations.json",
+    Path("Shared") / "stations.json",
+    Path("Next Wave Watch Watch App") / "stations.json",
+]
+
+# JSON datasets known to the DatasetRegistry, relative to the project root
+DATASETS = {
+    'stations': STATIONS_JSON_COPIES[0],
+    'schedule_periods': Path("Next Wave") / "Data" / "schedule_periods.json",
+    'alplakes_mapping_app': Path("Next Wave") / "Data" / "alplakes-lake-mapping.json",
+    'alplakes_mapping_api': Path("api") / "alplakes-lake-mapping.json",
+    'bafu_lake_stations': Path("api") / "bafu-lake-stations.json",
+    'bafu_lake_forecast': Path("api") / "bafu-lake-forecast.json",
+    'lake_water_levels': Path("api") / "lake-water-levels.json",
+}
+# Served ferry routes that are not lakes and have no water temperature or level data
+LAKES_WITHOUT_WATER_DATA = ('Aare',)
+
+METRICS_VERSION = 1
+# Number of profile entries and allocation sites kept in the metrics document
+METRICS_TOP_N = 15
+
+SCHEDULE_PERIOD_TYPES = ('spring', 'summer', 'autumn', 'winter')
+SCHEDULE_LOOKUP_VERSION = 1
+SCHEDULE_LOOKUP_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+class StationRecord:
+    """A single row of a StationTable."""
+
+    __slots__ = ('row', 'name', 'uic_ref', 'latitude', 'longitude', 'lake')
+
+    def __init__(self, row, name, uic_ref, latitude, longitude, lake):
+        self.row = row
+        self.name = name
+        self.uic_ref = uic_ref
+        self.latitude = latitude
+        self.longitude = longitude
+        self.lake = lake
+
+    @property
+    def has_coordinates(self):
+        return self.latitude is not None
+
+    def __repr__(self):
+        return f"StationRecord({self.name!r}, lake={self.lake!r})"
+
+class StationTable:
+    """Column-oriented store for the stations of stations.json.
+
+    Coordinates live in ``array('d')`` columns (NaN when a station has none)
+    and every station refers to its lake by id. Stations are stored in file
+    order, so the rows of lake ``i`` are ``lake_offsets[i]:lake_offsets[i + 1]``.
+    """
+
+    __slots__ = ('names', 'uic_refs', 'latitude', 'longitude', 'lake_ids', 'lake_names', 'lake_offsets')
+
+    def __init__(self):
+        self.names = []
+        self.uic_refs = []
+        self.latitude = array('d')
+        self.longitude = array('d')
+        self.lake_ids = array('I')
+        self.lake_names = []
+        self.lake_offsets = array('I', [0])
+
+    def add_lake(self, name):
+        """Start a new lake; stations appended afterwards belong to it."""
+        self.lake_names.append(name)
+        self.lake_offsets.append(len(self.names))
+        return len(self.lake_names) - 1
+
+    def append(self, name, uic_ref=None, latitude=None, longitude=None):
+        """Append a station to the most recently added lake."""
+        if not self.lake_names:
+            raise ValueError("add_lake() must be called before appending stations")
+        self.names.append(name)
+        self.uic_refs.append(uic_ref or None)
+        self.latitude.append(math.nan if latitude is None else latitude)
+        self.longitude.append(math.nan if longitude is None else longitude)
+        self.lake_ids.append(len(self.lake_names) - 1)
+        self.lake_offsets[-1] = len(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return (self.record(row) for row in range(len(self.names)))
+
+    def has_coordinates(self, row):
+        return not math.isnan(self.latitude[row])
+
+    def record(self, row):
+        """Materialize one row as a StationRecord."""
+        latitude = self.latitude[row]
+        has_coordinates = not math.isnan(latitude)
+        return StationRecord(
+            row,
+            self.names[row],
+            self.uic_refs[row],
+            latitude if has_coordinates else None,
+            self.longitude[row] if has_coordinates else None,
+            self.lake_names[self.lake_ids[row]]
+        )
+
+    def lake_rows(self, lake_id):
+        """Row range holding the stations of one lake."""
+        return range(self.lake_offsets[lake_id], self.lake_offsets[lake_id + 1])
+
+    def count_with_coordinates(self):
+        if np is not None:
+            return int(np.count_nonzero(~np.isnan(np.frombuffer(self.latitude, dtype=np.float64))))
+        return sum(1 for latitude in self.latitude if not math.isnan(latitude))
+
+def station_table_from_data(data):
+    """Build a StationTable from a parsed stations.json document."""
+    table = StationTable()
     for lake in data['lakes']:
+        table.add_lake(lake['name'])
         for station in lake['stations']:
             if isinstance(station, str):
                 # Handle string-only stations (no coordinates)
-                stations.append({
-                    'name': station,
-                    'uic_ref': None,
-                    'coordinates': None,
-                    'lake': lake['name']
-                })
+                table.append(station)
             else:
                 # Handle full station objects
-                stations.append({
-                    'name': station['name'],
-                    'uic_ref': station.get('uic_ref'),
-                    'coordinates': station.get('coordinates'),
-                    'lake': lake['name']
-                })
+                coordinates = station.get('coordinates')
+                if coordinates:
+                    table.append(station['name'], station.get('uic_ref'),
+                                 coordinates['latitude'], coordinates['longitude'])
+                else:
+                    table.append(station['name'], station.get('uic_ref'))
     
-    return stations
+    return table
+
+def load_stations_from_json(json_path):
+    """Load all stations from the JSON file into a StationTable."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return station_table_from_data(data)
+
+def _scan_swift_file(file_path, known_sha256=None):
+    """Read one Swift file and extract its StationData literals.
+
+    Returns a plain dict so the result can cross process boundaries. If the
+    content hash equals ``known_sha256`` the regex is skipped and ``matches``
+    is None, meaning the cached matches are still valid.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            raw = f.read()
+    except OSError as e:
+        return {'path': file_path, 'error': str(e)}
+
+    result = {
+        'path': file_path,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'bytes_read': len(raw),
+        'matches': None,
+        'error': None
+    }
+    if result['sha256'] == known_sha256:
+        return result
+
+    if STATION_PREFILTER not in raw:
+        result['matches'] = []
+        return result
+
+    try:
+        content = raw.decode('utf-8')
+    except UnicodeDecodeError as e:
+        return {'path': file_path, 'error': str(e)}
+    result['matches'] = [list(match) for match in STATION_PATTERN.findall(content)]
+    return result
+
+def _scan_swift_file_star(args):
+    return _scan_swift_file(*args)
+
+def _list_swift_files(directory):
+    """List all Swift files below a directory in a stable order."""
+    swift_files = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith('.swift'):
+                swift_files.append(os.path.join(root, name))
+    return swift_files
+
+def load_scan_cache(cache_path):
+    """Load the scanner cache, returning an empty cache if missing or stale."""
+    empty = {'version': SCAN_CACHE_VERSION, 'pattern': STATION_PATTERN.pattern, 'files': {}}
+    if not cache_path or not os.path.exists(cache_path):
+        return empty
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if cache.get('version') != SCAN_CACHE_VERSION or cache.get('pattern') != STATION_PATTERN.pattern:
+        return empty
+    return cache
+
+def save_scan_cache(cache_path, cache):
+    """Write the scanner cache atomically."""
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+def find_hardcoded_stations_in_code(directory, cache=None, workers=None, metrics=None, executor=None):
+    """Find hardcoded stations in Swift files.
+
+    Files whose path, mtime and size match an entry in ``cache`` are not read
+    at all; files whose content hash still matches reuse the cached matches.
+    The remaining files are scanned in a process pool once there are enough of
+    them to make that worthwhile, reusing ``executor`` when one is passed
+    so that scanning several directories starts only one pool. ``cache`` is
+    updated in place. If given, the ``metrics`` counters are incremented
+    with the files seen and read, bytes read, regex matches in the files
+    actually scanned and the stations returned (cached ones included).
+    """
+    cached_files = cache['files'] if cache is not None else {}
+    swift_files = _list_swift_files(directory)
+
+    entries = {}
+    to_scan = []
+    for file_path in swift_files:
+        entry = cached_files.get(file_path)
+        if entry is not None:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                entry = None
+            else:
+                if stat.st_mtime_ns == entry['mtime_ns'] and stat.st_size == entry['size']:
+                    entries[file_path] = entry
+                    continue
+        to_scan.append((file_path, entry['sha256'] if entry else None))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(to_scan) >= PARALLEL_SCAN_THRESHOLD:
+        chunksize = max(1, len(to_scan) // (workers * 4))
+        if executor is not None:
+            results = list(executor.map(_scan_swift_file_star, to_scan, chunksize=chunksize))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_scan_swift_file_star, to_scan, chunksize=chunksize))
+    else:
+        results = [_scan_swift_file(file_path, known_sha256) for file_path, known_sha256 in to_scan]
+
+    for result in results:
+        file_path = result['path']
+        if result['error']:
+            print(f"Error reading {file_path}: {result['error']}")
+            continue
+        matches = result['matches']
+        if matches is None:
+            matches = cached_files[file_path]['matches']
+        entries[file_path] = {
+            'mtime_ns': result['mtime_ns'],
+            'size': result['size'],
+            'sha256': result['sha256'],
+            'matches': matches
+        }
+        if metrics is not None:
+            metrics['swift_bytes_read'] += result['bytes_read']
+            if result['matches'] is None:
+                metrics['swift_files_unchanged_content'] += 1
+            else:
+                metrics['regex_matches'] += len(result['matches'])
+
+    if cache is not None:
+        # Drop entries for files that were deleted below this directory
+        prefix = os.path.join(str(directory), '')
+        for file_path in [p for p in cached_files if p.startswith(prefix) and p not in entries]:
+            del cached_files[file_path]
+        cached_files.update(entries)
+
+    if metrics is not None:
+        metrics['swift_files'] += len(swift_files)
+        metrics['swift_files_read'] += len(to_scan)
+        metrics['swift_files_cached'] += len(swift_files) - len(to_scan)
 
-def find_hardcoded_stations_in_code(directory):
-    """Find hardcoded stations in Swift files."""
     hardcoded_stations = []
-    swift_files = list(Path(directory).rglob("*.swift"))
-    
     for file_path in swift_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Look for StationData patterns
-            station_pattern = r'StationData\s*\(\s*id:\s*"([^"]+)",\s*name:\s*"([^"]+)",\s*latitude:\s*([\d.-]+),\s*longitude:\s*([\d.-]+),\s*uic_ref:\s*"([^"]*)"?\s*\)'
-            matches = re.findall(station_pattern, content, re.MULTILINE)
-            
-            for match in matches:
-                hardcoded_stations.append({
-                    'id': match[0],
-                    'name': match[1],
-                    'latitude': float(match[2]),
-                    'longitude': float(match[3]),
-                    'uic_ref': match[4] if match[4] else None,
-                    'file': str(file_path)
-                })
-                
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-    
+        entry = entries.get(file_path)
+        if entry is None:
+            continue
+        for match in entry['matches']:
+            hardcoded_stations.append({
+                'id': match[0],
+                'name': match[1],
+                'latitude': float(match[2]),
+                'longitude': float(match[3]),
+                'uic_ref': match[4] if match[4] else None,
+                'file': file_path
+            })
+    if metrics is not None:
+        metrics['hardcoded_stations'] += len(hardcoded_stations)
+
     return hardcoded_stations
 
-def compare_stations(json_stations, hardcoded_stations):
-    """Compare JSON stations with hardcoded stations."""
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two coordinates in metres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+_NAME_SUFFIX = re.compile(r'\s*\([^)]*\)\s*$')
+_NAME_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+def normalize_station_name(name):
+    """Lowercase, strip accents and the "(See)"/"(lac)" style suffix of a station name."""
+    name = _NAME_SUFFIX.sub('', name)
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join(c for c in name if not unicodedata.combining(c))
+    return _NAME_SEPARATORS.sub(' ', name.lower()).strip()
+
+def name_trigrams(name):
+    """Set of character trigrams of a normalized, space-padded name."""
+    padded = f"  {normalize_station_name(name)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class StationIndex:
+    """Lookup structures over a StationTable.
+
+    Built once per run: exact dicts from name and UIC ref to row, a uniform
+    lat/lon grid for nearest-neighbour and proximity queries and a trigram
+    index for fuzzy name suggestions. The trigram index is only built the
+    first time a suggestion is requested.
+    """
+
+    def __init__(self, table, cell_deg=GRID_CELL_DEG):
+        self.table = table
+        self.cell_deg = cell_deg
+        self.by_name = {}
+        self.by_uic = {}
+        self.grid = defaultdict(list)
+        self._trigrams = None
+        self._trigram_counts = None
+
+        latitude = table.latitude
+        longitude = table.longitude
+        for row, name in enumerate(table.names):
+            # Later duplicates win, as in the plain dicts this index replaced
+            self.by_name[name] = row
+            uic_ref = table.uic_refs[row]
+            if uic_ref:
+                self.by_uic[uic_ref] = row
+            if not math.isnan(latitude[row]):
+                self.grid[self._cell(latitude[row], longitude[row])].append(row)
+        self.coordinate_count = sum(len(rows) for rows in self.grid.values())
+        if self.grid:
+            rows, columns = zip(*self.grid)
+            self.grid_bounds = (min(rows), max(rows), min(columns), max(columns))
+
+    def _cell(self, latitude, longitude):
+        return (math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg))
+
+    def _ring(self, center, radius):
+        """Grid cells at Chebyshev distance ``radius`` from ``center``."""
+        ci, cj = center
+        if radius == 0:
+            yield center
+            return
+        for dj in range(-radius, radius + 1):
+            yield (ci - radius, cj + dj)
+            yield (ci + radius, cj + dj)
+        for di in range(-radius + 1, radius):
+            yield (ci + di, cj - radius)
+            yield (ci + di, cj + radius)
+
+    def _ring_min_distance_m(self, latitude, radius):
+        """Lower bound for the distance to any point in ring ``radius + 1``."""
+        # Longitude degrees shrink towards the poles; use the widest latitude of the ring
+        max_lat = min(89.0, abs(latitude) + (radius + 1) * self.cell_deg)
+        deg_m = math.pi * EARTH_RADIUS_M / 180
+        return radius * self.cell_deg * deg_m * math.cos(math.radians(max_lat))
+
+    def _nearest_rows(self, latitude, longitude, k=1):
+        if not self.grid:
+            return []
+        table = self.table
+        center = self._cell(latitude, longitude)
+        min_i, max_i, min_j, max_j = self.grid_bounds
+        max_radius = max(abs(center[0] - min_i), abs(center[0] - max_i), abs(center[1] - min_j), abs(center[1] - max_j))
+        # Rings closer than the grid's bounding box are empty
+        min_radius = max(min_i - center[0], center[0] - max_i, min_j - center[1], center[1] - max_j, 0)
+
+        def consider(row):
+            distance = haversine_m(latitude, longitude, table.latitude[row], table.longitude[row])
+            item = (-distance, row)
+            if len(best) < k:
+                heapq.heappush(best, item)
+            elif item > best[0]:
+                heapq.heapreplace(best, item)
+
+        best = []
+        cells_visited = 0
+        for radius in range(min_radius, max_radius + 1):
+            cells_visited += 8 * radius or 1
+            if cells_visited > self.coordinate_count:
+                # Points far from any station (a swapped lat/lon) would walk
+                # more empty cells than there are stations; scan them instead
+                best = []
+                for rows in self.grid.values():
+                    for row in rows:
+                        consider(row)
+                break
+            for cell in self._ring(center, radius):
+                for row in self.grid.get(cell, ()):
+                    consider(row)
+            if len(best) == k and -best[0][0] <= self._ring_min_distance_m(latitude, radius):
+                break
+        return [(-d, row) for d, row in sorted(best, reverse=True)]
+
+    def nearest(self, latitude, longitude, k=1):
+        """Return up to ``k`` (distance_m, StationRecord) pairs closest to a coordinate."""
+        return [(d, self.table.record(row)) for d, row in self._nearest_rows(latitude, longitude, k)]
+
+    def within(self, latitude, longitude, radius_m):
+        """Return (distance_m, row) for all stations within ``radius_m`` of a coordinate."""
+        table = self.table
+        lat_cells = math.ceil(radius_m / (math.pi * EARTH_RADIUS_M / 180) / self.cell_deg)
+        lon_scale = max(math.cos(math.radians(min(89.0, abs(latitude) + lat_cells * self.cell_deg))), 1e-6)
+        lon_cells = math.ceil(lat_cells / lon_scale)
+        ci, cj = self._cell(latitude, longitude)
+        found = []
+        for i in range(ci - lat_cells, ci + lat_cells + 1):
+            for j in range(cj - lon_cells, cj + lon_cells + 1):
+                for row in self.grid.get((i, j), ()):
+                    distance = haversine_m(latitude, longitude, table.latitude[row], table.longitude[row])
+                    if distance <= radius_m:
+                        found.append((distance, row))
+        return sorted(found)
+
+    def _build_trigrams(self):
+        self._trigrams = defaultdict(list)
+        self._trigram_counts = array('H')
+        for row, name in enumerate(self.table.names):
+            grams = name_trigrams(name)
+            self._trigram_counts.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                self._trigrams[gram].append(row)
+
+    def suggest_names(self, name, limit=3, min_score=NAME_SUGGESTION_MIN_SCORE):
+        """Return up to ``limit`` (score, StationRecord) pairs with similar names (Dice coefficient).
+
+        A name listed more than once is suggested once, as the row by_name resolves it to.
+        """
+        grams = name_trigrams(name)
+        if not grams:
+            return []
+        if self._trigrams is None:
+            self._build_trigrams()
+        postings = [self._trigrams.get(gram, ()) for gram in grams]
+        # Trigrams found in a large share of all names (" st", "see") barely
+        # separate candidates but dominate the cost on big networks
+        common_limit = max(COMMON_TRIGRAM_MIN_ROWS, int(len(self.table) * COMMON_TRIGRAM_SHARE))
+        rare = [rows for rows in postings if len(rows) <= common_limit]
+        shared = defaultdict(int)
+        for rows in (rare if rare and len(rare) < len(postings) else postings):
+            for row in rows:
+                shared[row] += 1
+
+        if rare and len(rare) < len(postings):
+            # Shortlist by rare trigrams, then score the shortlist exactly
+            shortlist = heapq.nlargest(limit * SUGGESTION_SHORTLIST_FACTOR, shared.items(),
+                                       key=lambda item: (item[1], -item[0]))
+            shared = {row: len(grams & name_trigrams(self.table.names[row])) for row, _ in shortlist}
+
+        scored = []
+        for row, count in shared.items():
+            score = 2 * count / (len(grams) + self._trigram_counts[row])
+            if score >= min_score:
+                scored.append((score, row))
+        suggestions = []
+        seen = set()
+        for score, row in sorted(scored, key=lambda item: (-item[0], item[1])):
+            name = self.table.names[row]
+            if name in seen:
+                continue
+            seen.add(name)
+            suggestions.append((score, self.table.record(self.by_name[name])))
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+    def find_duplicates(self, near_m=NEAR_COINCIDENT_M):
+        """Find stations listed more than once or lying on top of each other.
+
+        Returns a dict with ``same_name`` and ``same_uic`` groups (lists of
+        StationRecords) and ``near_coincident`` pairs of differently
+        identified stations closer than ``near_m``.
+        """
+        table = self.table
+        by_name = defaultdict(list)
+        by_uic = defaultdict(list)
+        for row, name in enumerate(table.names):
+            by_name[name].append(row)
+            if table.uic_refs[row]:
+                by_uic[table.uic_refs[row]].append(row)
+
+        near_coincident = []
+        for rows in self.grid.values():
+            for row in rows:
+                uic_ref = table.uic_refs[row]
+                for distance, other_row in self.within(table.latitude[row], table.longitude[row], near_m):
+                    if other_row <= row:
+                        continue
+                    if table.names[other_row] == table.names[row] or (uic_ref and table.uic_refs[other_row] == uic_ref):
+                        continue
+                    near_coincident.append((distance, table.record(row), table.record(other_row)))
+
+        return {
+            'same_name': [[table.record(row) for row in rows] for rows in by_name.values() if len(rows) > 1],
+            'same_uic': [[table.record(row) for row in rows] for rows in by_uic.values() if len(rows) > 1],
+            'near_coincident': sorted(near_coincident, key=lambda item: (item[0], item[1].row))
+        }
+
+    def build_nearest_lookup(self, margin_deg=0.1):
+        """Precompute candidate lists for nearest-station queries.
+
+        The bounding box of all stations (plus ``margin_deg``) is split into
+        grid cells. For every cell the list holds each station that can be
+        the nearest one for some point inside the cell, so a client only has
+        to compare distances against that short list. Points outside the box
+        fall back to a full scan.
+        """
+        table = self.table
+        rows = sorted(row for cell_rows in self.grid.values() for row in cell_rows)
+        if not rows:
+            return None
+        lats = [table.latitude[row] for row in rows]
+        lons = [table.longitude[row] for row in rows]
+        min_i, min_j = self._cell(min(lats) - margin_deg, min(lons) - margin_deg)
+        max_i, max_j = self._cell(max(lats) + margin_deg, max(lons) + margin_deg)
+
+        out_index = {row: n for n, row in enumerate(rows)}
+        cells = []
+        for i in range(min_i, max_i + 1):
+            south = i * self.cell_deg
+            center_lat = south + self.cell_deg / 2
+            for j in range(min_j, max_j + 1):
+                west = j * self.cell_deg
+                center_lon = west + self.cell_deg / 2
+                half_diagonal = haversine_m(center_lat, center_lon, south + self.cell_deg, west + self.cell_deg)
+                nearest_distance = self._nearest_rows(center_lat, center_lon)[0][0]
+                # Any point in the cell is within half_diagonal of the centre, so a
+                # station further than nearest + 2 * half_diagonal can never win
+                candidates = self.within(center_lat, center_lon, nearest_distance + 2 * half_diagonal)
+                cells.append([out_index[row] for _, row in candidates])
+
+        return {
+            'version': NEAREST_LOOKUP_VERSION,
+            'cell_size_deg': self.cell_deg,
+            'origin': {'latitude': min_i * self.cell_deg, 'longitude': min_j * self.cell_deg},
+            'rows': max_i - min_i + 1,
+            'columns': max_j - min_j + 1,
+            'stations': [
+                {
+                    'name': table.names[row],
+                    'uic_ref': table.uic_refs[row],
+                    'latitude': table.latitude[row],
+                    'longitude': table.longitude[row]
+                }
+                for row in rows
+            ],
+            # Row-major: cells[row * columns + column]
+            'cells': cells
+        }
+
+def report_duplicates(index):
+    """Print duplicate and near-coincident stations across all lakes."""
+    duplicates = index.find_duplicates()
+    if duplicates['same_name']:
+        print("ℹ️  Stations listed more than once:")
+        for group in duplicates['same_name']:
+            lakes = ', '.join(s.lake for s in group)
+            print(f"   • {group[0].name} ({lakes})")
+        print()
+    same_name_uics = {s.uic_ref for group in duplicates['same_name'] for s in group}
+    uic_conflicts = [g for g in duplicates['same_uic'] if g[0].uic_ref not in same_name_uics]
+    if uic_conflicts:
+        print("⚠️  UIC refs shared by differently named stations:")
+        for group in uic_conflicts:
+            names = ', '.join(f"{s.name} ({s.lake})" for s in group)
+            print(f"   • {group[0].uic_ref}: {names}")
+        print()
+    if duplicates['near_coincident']:
+        print(f"⚠️  Different stations less than {NEAR_COINCIDENT_M:.0f} m apart:")
+        for distance, a, b in duplicates['near_coincident']:
+            print(f"   • {a.name} ({a.lake}) ↔ {b.name} ({b.lake}): {distance:.0f} m")
+        print()
+    return duplicates
+
+def coordinate_mismatch_flags(table, rows, latitudes, longitudes, tolerance=COORDINATE_TOLERANCE_DEG):
+    """Flag table rows whose coordinates differ from the given ones by more than ``tolerance``.
+
+    Rows without coordinates are never flagged. Uses NumPy when available.
+    """
+    if np is not None and rows:
+        index = np.asarray(rows, dtype=np.intp)
+        table_lat = np.frombuffer(table.latitude, dtype=np.float64)[index]
+        table_lon = np.frombuffer(table.longitude, dtype=np.float64)[index]
+        # NaN compares False, so stations without coordinates drop out here
+        flags = (np.abs(table_lat - np.asarray(latitudes)) > tolerance) | \
+                (np.abs(table_lon - np.asarray(longitudes)) > tolerance)
+        return flags.tolist()
+    return [
+        abs(table.latitude[row] - latitude) > tolerance or abs(table.longitude[row] - longitude) > tolerance
+        for row, latitude, longitude in zip(rows, latitudes, longitudes)
+    ]
+
+def compare_stations(json_stations, hardcoded_stations, index=None):
+    """Compare the StationTable from stations.json with hardcoded stations."""
     print("=== STATION CONSISTENCY CHECK ===\n")
     
     # Create lookup dictionaries
-    json_by_name = {s['name']: s for s in json_stations}
-    json_by_uic = {s['uic_ref']: s for s in json_stations if s['uic_ref']}
+    if index is None:
+        index = StationIndex(json_stations)
+    json_by_name = index.by_name
+    json_by_uic = index.by_uic
     
     print(f"📊 Total stations in JSON: {len(json_stations)}")
     print(f"📊 Total hardcoded stations found: {len(hardcoded_stations)}")
@@ -80,46 +699,54 @@ def compare_stations(json_stations, hardcoded_stations):
     consistent = True
     missing_in_json = []
     coordinate_mismatches = []
+    matched = []
+    matched_rows = []
     
     for hardcoded in hardcoded_stations:
         name = hardcoded['name']
         uic_ref = hardcoded['uic_ref']
         
         # Try to find matching station in JSON
-        json_station = None
-        if name in json_by_name:
-            json_station = json_by_name[name]
-        elif uic_ref and uic_ref in json_by_uic:
-            json_station = json_by_uic[uic_ref]
+        row = json_by_name.get(name)
+        if row is None and uic_ref:
+            row = json_by_uic.get(uic_ref)
         
-        if not json_station:
+        if row is None:
             missing_in_json.append(hardcoded)
             consistent = False
             continue
-        
-        # Check coordinates if available
-        if json_station['coordinates']:
-            json_lat = json_station['coordinates']['latitude']
-            json_lon = json_station['coordinates']['longitude']
-            
-            lat_diff = abs(json_lat - hardcoded['latitude'])
-            lon_diff = abs(json_lon - hardcoded['longitude'])
-            
-            # Allow small differences due to floating point precision
-            if lat_diff > 0.001 or lon_diff > 0.001:
-                coordinate_mismatches.append({
-                    'name': name,
-                    'hardcoded': f"{hardcoded['latitude']}, {hardcoded['longitude']}",
-                    'json': f"{json_lat}, {json_lon}",
-                    'file': hardcoded['file']
-                })
-                consistent = False
+        matched.append(hardcoded)
+        matched_rows.append(row)
+    
+    # Check coordinates where available, allowing small floating point differences
+    flags = coordinate_mismatch_flags(
+        json_stations,
+        matched_rows,
+        [h['latitude'] for h in matched],
+        [h['longitude'] for h in matched]
+    )
+    for hardcoded, row, flagged in zip(matched, matched_rows, flags):
+        if flagged:
+            coordinate_mismatches.append({
+                'name': hardcoded['name'],
+                'hardcoded': f"{hardcoded['latitude']}, {hardcoded['longitude']}",
+                'json': f"{json_stations.latitude[row]}, {json_stations.longitude[row]}",
+                'file': hardcoded['file']
+            })
+            consistent = False
     
     # Print results
     if missing_in_json:
         print("❌ Stations hardcoded but not found in JSON:")
         for station in missing_in_json:
             print(f"   • {station['name']} (UIC: {station['uic_ref']}) in {station['file']}")
+            nearest = index.nearest(station['latitude'], station['longitude'])
+            if nearest:
+                distance, closest = nearest[0]
+                print(f"     Closest JSON station is {distance:.0f} m away: {closest.name} ({closest.lake})")
+            suggestions = index.suggest_names(station['name'])
+            if suggestions:
+                print(f"     Did you mean: {', '.join(s.name for _, s in suggestions)}")
         print()
     
     if coordinate_mismatches:
@@ -137,46 +764,805 @@ def compare_stations(json_stations, hardcoded_stations):
         print("❌ Found inconsistencies between hardcoded stations and JSON")
     
     # Show some statistics
-    stations_with_coords = sum(1 for s in json_stations if s['coordinates'])
+    stations_with_coords = json_stations.count_with_coordinates()
     print(f"\n📍 Stations with coordinates in JSON: {stations_with_coords}")
     
-    lakes = set(s['lake'] for s in json_stations)
-    print(f"🏞️  Lakes covered: {len(lakes)}")
-    for lake in sorted(lakes):
-        lake_stations = [s for s in json_stations if s['lake'] == lake]
-        print(f"   • {lake}: {len(lake_stations)} stations")
+    lake_counts = defaultdict(int)
+    for lake_id, lake in enumerate(json_stations.lake_names):
+        lake_counts[lake] += len(json_stations.lake_rows(lake_id))
+    print(f"🏞️  Lakes covered: {len(lake_counts)}")
+    for lake in sorted(lake_counts):
+        print(f"   • {lake}: {lake_counts[lake]} stations")
     
     return consistent
 
-def main():
+def file_sha256(path, chunk_size=1 << 20):
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _flatten_fields(value, prefix=''):
+    """Flatten nested dicts into {"coordinates.latitude": ...} style fields."""
+    if not isinstance(value, dict):
+        return {prefix or 'value': value}
+    fields = {}
+    for key, item in value.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(item, dict):
+            fields.update(_flatten_fields(item, name))
+        else:
+            fields[name] = item
+    return fields
+
+def _diff_fields(reference, other):
+    """Return {field: [reference_value, other_value]} for fields that differ."""
+    changes = {}
+    for field in sorted(set(reference) | set(other)):
+        if reference.get(field) != other.get(field):
+            changes[field] = [reference.get(field), other.get(field)]
+    return changes
+
+def _station_fields(station):
+    if isinstance(station, str):
+        return {'name': station}
+    return _flatten_fields(station)
+
+def _station_key(fields):
+    return f"uic:{fields['uic_ref']}" if fields.get('uic_ref') else f"name:{fields.get('name')}"
+
+def _match_stations(reference_stations, other_stations):
+    """Pair up stations by UIC ref first, then by name.
+
+    Returns (pairs, unmatched_reference, unmatched_other) with stations as
+    flattened field dicts.
+    """
+    reference = [_station_fields(s) for s in reference_stations]
+    other = [_station_fields(s) for s in other_stations]
+    unmatched_other = set(range(len(other)))
+    pairs = []
+    unmatched_reference = []
+
+    by_uic = defaultdict(list)
+    by_name = defaultdict(list)
+    for i, fields in enumerate(other):
+        if fields.get('uic_ref'):
+            by_uic[fields['uic_ref']].append(i)
+        by_name[fields.get('name')].append(i)
+
+    pending = []
+    for fields in reference:
+        candidates = [i for i in by_uic.get(fields.get('uic_ref'), ()) if i in unmatched_other] if fields.get('uic_ref') else []
+        if candidates:
+            # Several stations may share a UIC ref; prefer the one with the same name
+            same_name = [i for i in candidates if other[i].get('name') == fields.get('name')]
+            i = (same_name or candidates)[0]
+            unmatched_other.discard(i)
+            pairs.append((fields, other[i]))
+        else:
+            pending.append(fields)
+
+    for fields in pending:
+        candidates = [i for i in by_name.get(fields.get('name'), ()) if i in unmatched_other]
+        if candidates:
+            unmatched_other.discard(candidates[0])
+            pairs.append((fields, other[candidates[0]]))
+        else:
+            unmatched_reference.append(fields)
+
+    return pairs, unmatched_reference, [other[i] for i in sorted(unmatched_other)]
+
+def diff_stations_data(reference, other):
+    """Structural diff of two parsed stations.json documents, keyed by lake and station."""
+    reference_lakes = {lake['name']: lake for lake in reference.get('lakes', [])}
+    other_lakes = {lake['name']: lake for lake in other.get('lakes', [])}
+    diff = {
+        'lakes_added': sorted(set(other_lakes) - set(reference_lakes)),
+        'lakes_removed': sorted(set(reference_lakes) - set(other_lakes)),
+        'lakes': {}
+    }
+
+    for name in sorted(set(reference_lakes) & set(other_lakes)):
+        reference_lake = reference_lakes[name]
+        other_lake = other_lakes[name]
+        lake_diff = {}
+
+        field_changes = _diff_fields(
+            {k: v for k, v in reference_lake.items() if k != 'stations'},
+            {k: v for k, v in other_lake.items() if k != 'stations'}
+        )
+        if field_changes:
+            lake_diff['fields_changed'] = field_changes
+
+        pairs, removed, added = _match_stations(reference_lake.get('stations', []), other_lake.get('stations', []))
+        changed = []
+        for reference_fields, other_fields in pairs:
+            changes = _diff_fields(reference_fields, other_fields)
+            if changes:
+                changed.append({'key': _station_key(reference_fields), 'changes': changes})
+        if added:
+            lake_diff['stations_added'] = added
+        if removed:
+            lake_diff['stations_removed'] = removed
+        if changed:
+            lake_diff['stations_changed'] = changed
+        if lake_diff:
+            diff['lakes'][name] = lake_diff
+
+    return diff
+
+def compare_station_copies(project_root, copies=STATIONS_JSON_COPIES, registry=None):
+    """Check that all bundled stations.json copies are identical.
+
+    Hashes the raw bytes first and only parses the files when the hashes
+    differ. With a ``registry`` the copies are read through it, so the
+    reference copy is not read again when the station table is built.
+    Returns a machine-readable report; ``identical`` is True when all copies
+    match byte for byte.
+    """
+    paths = [Path(project_root) / copy for copy in copies]
+    report = {'reference': str(copies[0]), 'identical': True, 'copies': {}}
+
+    hashes = {}
+    for copy, path in zip(copies, paths):
+        if not path.exists():
+            report['copies'][str(copy)] = {'sha256': None, 'missing': True}
+            report['identical'] = False
+            continue
+        try:
+            if registry is not None:
+                raw = registry.read(copy)
+                hashes[copy] = hashlib.sha256(raw).hexdigest()
+                size = len(raw)
+            else:
+                hashes[copy] = file_sha256(path)
+                size = path.stat().st_size
+            report['copies'][str(copy)] = {'sha256': hashes[copy], 'size': size}
+        except OSError as e:
+            report['copies'][str(copy)] = {'sha256': None, 'error': str(e)}
+            report['identical'] = False
+
+    reference_hash = hashes.get(copies[0])
+    if reference_hash is None:
+        return report
+    drifted = [copy for copy in copies[1:] if copy in hashes and hashes[copy] != reference_hash]
+    if not drifted:
+        return report
+
+    report['identical'] = False
+
+    def parse(copy):
+        if registry is not None:
+            return json.loads(registry.read(copy))
+        with open(Path(project_root) / copy, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    try:
+        reference = parse(copies[0])
+    except (OSError, ValueError) as e:
+        report['copies'][str(copies[0])]['error'] = str(e)
+        return report
+    for copy in drifted:
+        try:
+            other = parse(copy)
+        except (OSError, ValueError) as e:
+            # A copy that does not parse is reported, not diffed
+            report['copies'][str(copy)]['error'] = str(e)
+            continue
+        report['copies'][str(copy)]['diff'] = diff_stations_data(reference, other)
+
+    return report
+
+def print_copies_report(report):
+    """Print a short human-readable summary of compare_station_copies()."""
+    if report['identical']:
+        print(f"✅ All {len(report['copies'])} stations.json copies are identical")
+        return
+    print(f"❌ stations.json copies differ from {report['reference']}:")
+    for copy, info in report['copies'].items():
+        if info.get('missing'):
+            print(f"   • {copy}: missing")
+            continue
+        if info.get('error'):
+            print(f"   • {copy}: unreadable ({info['error']})")
+            continue
+        diff = info.get('diff')
+        if diff is None:
+            continue
+        if not diff['lakes_added'] and not diff['lakes_removed'] and not diff['lakes']:
+            print(f"   • {copy}: same content, different formatting")
+            continue
+        print(f"   • {copy}:")
+        for lake in diff['lakes_added']:
+            print(f"     + lake {lake}")
+        for lake in diff['lakes_removed']:
+            print(f"     - lake {lake}")
+        for lake, lake_diff in diff['lakes'].items():
+            for field, (old, new) in lake_diff.get('fields_changed', {}).items():
+                print(f"     ~ {lake}.{field}: {old!r} → {new!r}")
+            for station in lake_diff.get('stations_added', []):
+                print(f"     + {lake}: {station.get('name')}")
+            for station in lake_diff.get('stations_removed', []):
+                print(f"     - {lake}: {station.get('name')}")
+            for change in lake_diff.get('stations_changed', []):
+                fields = ', '.join(change['changes'])
+                print(f"     ~ {lake}: {change['key']} ({fields})")
+
+class PeriodIntervalIndex:
+    """Stabbing-query index over the schedule periods of one lake and operator.
+
+    Periods are kept sorted by start day together with a running maximum of
+    their end days, so all periods covering a day are found with a bisect
+    plus a backwards walk that stops once no earlier period can reach it.
+    Days are ``date.toordinal()`` values and both ends are inclusive.
+    """
+
+    def __init__(self, periods):
+        # periods: (start_day, end_day, position in the source list)
+        self.intervals = sorted(periods)
+        self.starts = [start for start, _, _ in self.intervals]
+        self.max_end = []
+        running = -math.inf
+        for _, end, _ in self.intervals:
+            running = max(running, end)
+            self.max_end.append(running)
+
+    def covering(self, day):
+        """Source positions of all periods that include ``day``."""
+        found = []
+        i = bisect.bisect_right(self.starts, day) - 1
+        while i >= 0 and self.max_end[i] >= day:
+            start, end, position = self.intervals[i]
+            if end >= day:
+                found.append(position)
+            i -= 1
+        return sorted(found)
+
+    def overlaps(self):
+        """Pairs of source positions whose periods share at least one day."""
+        pairs = []
+        active = []
+        for start, end, position in self.intervals:
+            active = [(e, p) for e, p in active if e >= start]
+            pairs.extend((p, position) for _, p in active)
+            active.append((end, position))
+        return pairs
+
+    def gaps(self):
+        """(first_day, last_day) ranges between the first and last period that no period covers."""
+        gaps = []
+        for i in range(1, len(self.intervals)):
+            if self.intervals[i][0] > self.max_end[i - 1] + 1:
+                gaps.append((self.max_end[i - 1] + 1, self.intervals[i][0] - 1))
+        return gaps
+
+def _parse_schedule_day(value):
+    return datetime.date.fromisoformat(value).toordinal()
+
+def validate_schedule_periods(schedule_data, station_lakes):
+    """Validate schedule_periods.json against itself and the lakes in stations.json.
+
+    Returns (errors, warnings, indexes) where ``indexes`` maps
+    (lake, operator) to (periods, PeriodIntervalIndex) for every lake whose
+    periods could be parsed.
+    """
+    errors = []
+    warnings = []
+    indexes = {}
+    station_lakes = set(station_lakes)
+    operators_by_lake = defaultdict(list)
+
+    for lake in schedule_data.get('lakes', []):
+        name = lake.get('name')
+        operator = lake.get('operator')
+        periods = lake.get('schedule_periods', [])
+        operators_by_lake[name].append(operator)
+        if name not in station_lakes:
+            errors.append(f"{name} ({operator}): lake not found in stations.json")
+
+        intervals = []
+        for position, period in enumerate(periods):
+            label = f"{name} ({operator}) {period.get('name')}"
+            if period.get('type') not in SCHEDULE_PERIOD_TYPES:
+                errors.append(f"{label}: unknown period type {period.get('type')!r}")
+            try:
+                start = _parse_schedule_day(period['start_date'])
+                end = _parse_schedule_day(period['end_date'])
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append(f"{label}: invalid date ({e})")
+                continue
+            if end < start:
+                errors.append(f"{label}: ends {period['end_date']} before it starts {period['start_date']}")
+                continue
+            intervals.append((start, end, position))
+
+        index = PeriodIntervalIndex(intervals)
+        for a, b in index.overlaps():
+            first, second = periods[a], periods[b]
+            errors.append(
+                f"{name} ({operator}): {first['name']} ({first['start_date']} – {first['end_date']}) overlaps "
+                f"{second['name']} ({second['start_date']} – {second['end_date']})"
+            )
+        for first_day, last_day in index.gaps():
+            first = datetime.date.fromordinal(first_day)
+            last = datetime.date.fromordinal(last_day)
+            days = last_day - first_day + 1
+            warnings.append(f"{name} ({operator}): no period from {first} to {last} ({days} days)")
+        # Keep the first entry, like the app's lakes.first(where:)
+        indexes.setdefault((name, operator), (periods, index))
+
+    for name, operators in operators_by_lake.items():
+        if len(operators) > 1:
+            warnings.append(f"{name}: listed {len(operators)} times ({', '.join(map(str, operators))}), the app only uses the first")
+
+    return errors, warnings, indexes
+
+def build_schedule_lookup(indexes):
+    """Flatten validated schedule periods into a day-indexed lookup table.
+
+    For each lake the ``days`` string holds one character per day starting at
+    ``start_date``: the position of the active period in that lake's
+    ``periods`` list (base 36), or ``.`` when no period applies. Each day is
+    resolved with a stabbing query on the lake's PeriodIntervalIndex and, like
+    the app, picks the first listed period covering it. Resolving a date is
+    then a subtraction and a string index.
+    """
+    days = [day for _, index in indexes.values() for start, end, _ in index.intervals for day in (start, end)]
+    if not days:
+        return None
+    first_day, last_day = min(days), max(days)
+
+    lakes = {}
+    for (name, operator), (periods, index) in indexes.items():
+        if name in lakes:
+            # Matches the app, which uses the first entry for a lake name
+            continue
+        if len(periods) > len(SCHEDULE_LOOKUP_DIGITS):
+            raise ValueError(f"{name} has more than {len(SCHEDULE_LOOKUP_DIGITS)} periods")
+        cells = []
+        for day in range(first_day, last_day + 1):
+            covering = index.covering(day)
+            cells.append(SCHEDULE_LOOKUP_DIGITS[covering[0]] if covering else '.')
+        lakes[name] = {
+            'operator': operator,
+            'periods': [{'name': p['name'], 'type': p['type']} for p in periods],
+            'days': ''.join(cells)
+        }
+
+    return {
+        'version': SCHEDULE_LOOKUP_VERSION,
+        'start_date': datetime.date.fromordinal(first_day).isoformat(),
+        'day_count': last_day - first_day + 1,
+        'lakes': lakes
+    }
+
+def check_schedule_periods(schedule_data, station_lakes):
+    """Validate parsed schedule_periods.json data, printing the results.
+
+    Returns (valid, indexes); ``valid`` is False when any error was found.
+    """
+    errors, warnings, indexes = validate_schedule_periods(schedule_data, station_lakes)
+
+    print("=== SCHEDULE PERIODS CHECK ===\n")
+    if errors:
+        print("❌ Schedule period errors:")
+        for error in errors:
+            print(f"   • {error}")
+        print()
+    if warnings:
+        print("⚠️  Schedule period gaps and notes:")
+        for warning in warnings:
+            print(f"   • {warning}")
+        print()
+    if not errors:
+        print(f"✅ Schedule periods valid for {len(indexes)} lakes")
+    return not errors, indexes
+
+def _lakes_by_name(lakes):
+    """Hash index from lake name to the first record with that name."""
+    index = {}
+    for lake in lakes:
+        index.setdefault(lake['name'], lake)
+    return index
+
+# How to find the per-lake records in each dataset
+_LAKE_INDEXERS = {
+    'stations': lambda data: _lakes_by_name(data['lakes']),
+    'schedule_periods': lambda data: _lakes_by_name(data['lakes']),
+    'alplakes_mapping_app': lambda data: dict(data),
+    'alplakes_mapping_api': lambda data: dict(data['mapping']),
+    'bafu_lake_stations': lambda data: _lakes_by_name(data['lakes'] + data.get('additional_lakes', [])),
+    'bafu_lake_forecast': lambda data: _lakes_by_name(data['lakes_with_forecast']),
+    'lake_water_levels': lambda data: _lakes_by_name(data['lakes']),
+}
+
+class DatasetRegistry:
+    """Lazily loads the project's JSON datasets, each at most once per run.
+
+    Raw bytes, parsed documents and the indexes built on them are memoized,
+    so any number of checks can join against the same data without
+    re-reading or re-scanning files.
+    """
+
+    def __init__(self, project_root, datasets=DATASETS):
+        self.project_root = Path(project_root)
+        self.datasets = datasets
+        self.bytes_read = 0
+        self._raw = {}
+        self._data = {}
+        self._lake_indexes = {}
+        self._station_table = None
+        self._bafu_station_ids = None
+
+    def path(self, name):
+        return self.project_root / self.datasets[name]
+
+    def exists(self, name):
+        return self.path(name).exists()
+
+    def read(self, relative_path):
+        """Raw bytes of a file below the project root, read at most once."""
+        relative_path = Path(relative_path)
+        if relative_path not in self._raw:
+            raw = (self.project_root / relative_path).read_bytes()
+            self.bytes_read += len(raw)
+            self._raw[relative_path] = raw
+        return self._raw[relative_path]
+
+    def load(self, name):
+        """Parsed JSON of a dataset."""
+        if name not in self._data:
+            self._data[name] = json.loads(self.read(self.datasets[name]))
+        return self._data[name]
+
+    def lakes(self, name):
+        """Hash index from lake name to that lake's record in a dataset."""
+        if name not in self._lake_indexes:
+            self._lake_indexes[name] = _LAKE_INDEXERS[name](self.load(name))
+        return self._lake_indexes[name]
+
+    def station_table(self):
+        """StationTable built from stations.json."""
+        if self._station_table is None:
+            self._station_table = station_table_from_data(self.load('stations'))
+        return self._station_table
+
+    def bafu_station_ids(self):
+        """Hash index from BAFU station id to (lake name, station record)."""
+        if self._bafu_station_ids is None:
+            self._bafu_station_ids = {
+                station['id']: (lake_name, station)
+                for lake_name, lake in self.lakes('bafu_lake_stations').items()
+                for station in lake.get('stations', [])
+            }
+        return self._bafu_station_ids
+
+def _check_alplakes_mappings(registry, station_lakes):
+    errors, warnings = [], []
+    app_mapping = registry.lakes('alplakes_mapping_app')
+    api_mapping = registry.lakes('alplakes_mapping_api')
+    for lake in sorted(station_lakes):
+        if lake not in app_mapping:
+            errors.append(f"{lake}: no water temperature mapping in {registry.datasets['alplakes_mapping_app']}")
+        if lake not in api_mapping:
+            errors.append(f"{lake}: no water temperature mapping in {registry.datasets['alplakes_mapping_api']}")
+        elif lake in app_mapping and api_mapping[lake].get('alplakes_1d') != app_mapping[lake]:
+            errors.append(f"{lake}: Alplakes id {app_mapping[lake]!r} in the app mapping but "
+                          f"{api_mapping[lake].get('alplakes_1d')!r} in the API mapping")
+    return errors, warnings
+
+def _check_water_levels(registry, station_lakes):
+    levels = registry.lakes('lake_water_levels')
+    errors = [
+        f"{lake}: no average water level in {registry.datasets['lake_water_levels']}"
+        for lake in sorted(station_lakes) if lake not in levels
+    ]
+    return errors, []
+
+def _check_bafu(registry, station_lakes):
+    errors, warnings = [], []
+    bafu_lakes = registry.lakes('bafu_lake_stations')
+    station_ids = registry.bafu_station_ids()
+    for lake in sorted(station_lakes):
+        if lake not in bafu_lakes:
+            warnings.append(f"{lake}: no BAFU gauging station in {registry.datasets['bafu_lake_stations']}")
+    for lake, forecast in registry.lakes('bafu_lake_forecast').items():
+        if forecast.get('station_id') not in station_ids:
+            errors.append(f"{lake}: forecast station {forecast.get('station_id')} is not a known BAFU station")
+    return errors, warnings
+
+# Each check joins stations.json lakes against one or more datasets it names
+INTEGRITY_CHECKS = [
+    (('alplakes_mapping_app', 'alplakes_mapping_api'), _check_alplakes_mappings),
+    (('lake_water_levels',), _check_water_levels),
+    (('bafu_lake_stations', 'bafu_lake_forecast'), _check_bafu),
+]
+
+def check_dataset_integrity(registry):
+    """Run the cross-file integrity checks and print the results.
+
+    Lakes listed in LAKES_WITHOUT_WATER_DATA are exempt from the water data
+    checks. Returns False when any error was found.
+    """
+    station_lakes = set(registry.lakes('stations')) - set(LAKES_WITHOUT_WATER_DATA)
+    errors, warnings = [], []
+    for datasets, check in INTEGRITY_CHECKS:
+        missing = [name for name in datasets if not registry.exists(name)]
+        if missing:
+            errors.extend(f"{registry.datasets[name]} not found" for name in missing)
+            continue
+        unreadable = []
+        for name in datasets:
+            try:
+                registry.load(name)
+            except (OSError, ValueError) as e:
+                unreadable.append(f"{registry.datasets[name]}: unreadable ({e})")
+        if unreadable:
+            errors.extend(unreadable)
+            continue
+        try:
+            check_errors, check_warnings = check(registry, station_lakes)
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            # A reshaped dataset is an integrity error, not a crash
+            files = ', '.join(str(registry.datasets[name]) for name in datasets)
+            reason = f"missing key {e}" if isinstance(e, KeyError) else str(e)
+            errors.append(f"{files}: unexpected layout ({reason})")
+            continue
+        errors.extend(check_errors)
+        warnings.extend(check_warnings)
+
+    print("=== DATASET INTEGRITY CHECK ===\n")
+    if errors:
+        print("❌ Lake data missing or inconsistent:")
+        for error in errors:
+            print(f"   • {error}")
+        print()
+    if warnings:
+        print("⚠️  Lake data notes:")
+        for warning in warnings:
+            print(f"   • {warning}")
+        print()
+    if not errors:
+        print(f"✅ Water data mappings complete for {len(station_lakes)} lakes")
+    return not errors
+
+class RunMetrics:
+    """Per-phase timings and counters for one run of the checker.
+
+    Phases are timed with wall and CPU clocks; when ``trace_memory`` is set,
+    tracemalloc also records the peak allocation of each phase and the top
+    allocation sites at the end of the run. A phase that raises is recorded
+    with its error. The ``compare`` phase includes printing its report, since
+    compare_stations() reports as it goes.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = []
+        self.counters = defaultdict(int)
+        self.started = time.perf_counter()
+        self.created = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        if trace_memory:
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            record = {
+                'name': name,
+                'wall_s': round(time.perf_counter() - wall, 6),
+                'cpu_s': round(time.process_time() - cpu, 6)
+            }
+            if self.trace_memory:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            if error is not None:
+                record['error'] = error
+            self.phases.append(record)
+
+    def to_dict(self, success, profile=None):
+        document = {
+            'version': METRICS_VERSION,
+            'created': self.created,
+            'success': success,
+            'total_wall_s': round(time.perf_counter() - self.started, 6),
+            'phases': self.phases,
+            'counters': dict(self.counters)
+        }
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            document['allocations'] = [
+                {'site': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:METRICS_TOP_N]
+            ]
+            tracemalloc.stop()
+        if profile is not None:
+            stats = pstats.Stats(profile)
+            top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:METRICS_TOP_N]
+            document['profile'] = [
+                {
+                    'function': f"{path}:{line}({name})",
+                    'calls': calls,
+                    'tottime_s': round(tottime, 6),
+                    'cumtime_s': round(cumtime, 6)
+                }
+                for (path, line, name), (_, calls, tottime, cumtime, _) in top
+            ]
+        return document
+
+def write_metrics(path, document):
+    """Write metrics as a JSON document, or append one line if ``path`` ends in .ndjson."""
+    path = Path(path)
+    if path.suffix == '.ndjson':
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(document, ensure_ascii=False) + '\n')
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check consistency between stations.json and hardcoded stations.")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Rescan every Swift file instead of using the scan cache")
+    parser.add_argument('--cache-file', type=Path, default=None,
+                        help="Location of the scan cache (default: scripts/.stations_scan_cache.json)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of scanner processes (default: CPU count)")
+    parser.add_argument('--nearest-lookup', type=Path, default=None,
+                        help="Write a precomputed nearest-station lookup grid to this JSON file")
+    parser.add_argument('--copies-only', action='store_true',
+                        help="Only check that the bundled stations.json copies are in sync")
+    parser.add_argument('--copies-diff', type=Path, default=None,
+                        help="Write the stations.json copies report as JSON to this file")
+    parser.add_argument('--schedule-lookup', type=Path, default=None,
+                        help="Write the day-indexed schedule period lookup table to this JSON file")
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help="Write per-phase timings and counters as JSON (appended as one line for .ndjson)")
+    parser.add_argument('--profile', type=Path, default=None,
+                        help="Run under cProfile, dump the stats to this file and add the top functions to the metrics")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Record per-phase peak memory and top allocation sites with tracemalloc in the metrics")
+    args = parser.parse_args(argv)
+    if args.trace_memory and not args.metrics:
+        parser.error("--trace-memory requires --metrics")
+    return args
+
+def run_checks(args, metrics):
+    """Run all checks, timing each phase in ``metrics``. Returns True when consistent."""
     # Get the project root directory
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     
     # Paths
-    json_path = project_root / "Next Wave" / "Data" / "stations.json"
+    registry = DatasetRegistry(project_root)
     code_directories = [
         project_root / "Next Wave",
         project_root / "Next Wave Watch Watch App",
+        project_root / "NextWaveWidget",
+        project_root / "NextWaveWatchWidgetExtension",
     ]
+    cache_path = None if args.no_cache else (args.cache_file or script_dir / ".stations_scan_cache.json")
     
-    if not json_path.exists():
-        print(f"❌ stations.json not found at {json_path}")
+    if not registry.exists('stations'):
+        print(f"❌ stations.json not found at {registry.path('stations')}")
         return False
+
+    # Check the bundled copies first; when they match this only hashes bytes
+    with metrics.phase('copies'):
+        copies_report = compare_station_copies(project_root, registry=registry)
+        metrics.counters['copies_bytes_hashed'] += sum(c.get('size', 0) for c in copies_report['copies'].values())
+        print_copies_report(copies_report)
+        if args.copies_diff:
+            with open(args.copies_diff, 'w', encoding='utf-8') as f:
+                json.dump(copies_report, f, ensure_ascii=False, indent=2)
+    if args.copies_only:
+        return copies_report['identical']
+    print()
     
     # Load stations from JSON
-    json_stations = load_stations_from_json(json_path)
+    with metrics.phase('load'):
+        try:
+            json_stations = registry.station_table()
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            reason = f"missing key {e}" if isinstance(e, KeyError) else str(e)
+            print(f"❌ {registry.datasets['stations']} could not be loaded ({reason})")
+            return False
+        index = StationIndex(json_stations)
+    metrics.counters['stations'] = len(json_stations)
     
     # Find hardcoded stations in code
+    with metrics.phase('scan_cache_load'):
+        cache = load_scan_cache(cache_path) if cache_path else None
     all_hardcoded = []
-    for directory in code_directories:
-        if directory.exists():
-            hardcoded = find_hardcoded_stations_in_code(directory)
-            all_hardcoded.extend(hardcoded)
+    workers = args.workers or os.cpu_count() or 1
+    # Worker processes only start if a directory is large enough to use them
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for directory in code_directories:
+            if directory.exists():
+                with metrics.phase(f"scan:{directory.name}"):
+                    hardcoded = find_hardcoded_stations_in_code(directory, cache=cache, workers=workers,
+                                                                metrics=metrics.counters, executor=executor)
+                all_hardcoded.extend(hardcoded)
+    if cache_path:
+        with metrics.phase('scan_cache_save'):
+            save_scan_cache(cache_path, cache)
     
     # Compare
-    return compare_stations(json_stations, all_hardcoded)
+    with metrics.phase('compare'):
+        consistent = compare_stations(json_stations, all_hardcoded, index=index) and copies_report['identical']
+    print()
+    with metrics.phase('duplicates'):
+        report_duplicates(index)
+
+    if args.nearest_lookup:
+        with metrics.phase('nearest_lookup'):
+            lookup = index.build_nearest_lookup()
+            with open(args.nearest_lookup, 'w', encoding='utf-8') as f:
+                json.dump(lookup, f, ensure_ascii=False, separators=(',', ':'))
+        max_candidates = max(len(cell) for cell in lookup['cells'])
+        print(f"🗺️  Wrote nearest-station lookup ({lookup['rows']}×{lookup['columns']} cells, "
+              f"≤{max_candidates} candidates per cell) to {args.nearest_lookup}")
+
+    if registry.exists('schedule_periods'):
+        print()
+        with metrics.phase('schedule'):
+            try:
+                schedule_valid, schedule_indexes = check_schedule_periods(registry.load('schedule_periods'),
+                                                                          json_stations.lake_names)
+            except ValueError as e:
+                print(f"❌ {registry.datasets['schedule_periods']} could not be loaded ({e})")
+                schedule_valid, schedule_indexes = False, {}
+        consistent = consistent and schedule_valid
+        if args.schedule_lookup:
+            if not schedule_valid:
+                print("❌ Not writing the schedule lookup table while schedule periods have errors")
+            else:
+                with metrics.phase('schedule_lookup'):
+                    schedule_lookup = build_schedule_lookup(schedule_indexes)
+                    with open(args.schedule_lookup, 'w', encoding='utf-8') as f:
+                        json.dump(schedule_lookup, f, ensure_ascii=False, separators=(',', ':'))
+                print(f"📅 Wrote schedule lookup ({len(schedule_lookup['lakes'])} lakes × "
+                      f"{schedule_lookup['day_count']} days) to {args.schedule_lookup}")
+
+    print()
+    with metrics.phase('integrity'):
+        consistent = check_dataset_integrity(registry) and consistent
+    metrics.counters['dataset_bytes_read'] = registry.bytes_read
+
+    return consistent
+
+def main(argv=None):
+    args = parse_args(argv)
+    metrics = RunMetrics(trace_memory=args.trace_memory)
+    profile = cProfile.Profile() if args.profile else None
+
+    success = False
+    if profile is not None:
+        profile.enable()
+    try:
+        success = run_checks(args, metrics)
+    finally:
+        # Also written when the run raises, with the phases recorded so far
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(args.profile)
+        if args.metrics:
+            write_metrics(args.metrics, metrics.to_dict(success, profile))
+            print(f"\n📈 Metrics written to {args.metrics}")
+
+    return success
 
 if __name__ == "__main__":
     success = main()
-    exit(0 if success else 1) 
\ No newline at end of file
+    exit(0 if success else 1)
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the transport.opendata.ch stationboard API.
+
+Serves recorded or synthetic departures for the stations in stations.json,
+with configurable latency and error injection, and records how the apps
+load it: requests per station, duplicate requests for the same station and
+date (what the getCacheKey(for:date:) cache should absorb), concurrency and
+the resulting cache-miss ratio.
+
+Endpoints:
+    GET /v1/stationboard?id=<uic_ref>&limit=<n>&date=<yyyy-mm-dd>
+    GET /stats          statistics of the current session
+    GET /stats/reset    return the statistics and start a new session
+
+Usage:
+    python3 scripts/stationboard_standin.py --port 8787 --latency-ms 300 --error-rate 0.05
+    python3 scripts/stationboard_standin.py --drive 12 --days 2 --rounds 3
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import signal
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from zoneinfo import ZoneInfo
+
+from check_stations_consistency import DatasetRegistry
+
+DEFAULT_LIMIT = 30
+# Request timeout the apps use; --drive gives up after it as well
+CLIENT_TIMEOUT_SECONDS = 15.0
+# Longer than the apps' request timeout
+TIMEOUT_SECONDS = 20.0
+# Synthetic boats run every this many minutes between these hours
+SYNTHETIC_INTERVAL_MINUTES = 45
+SYNTHETIC_HOURS = (7, 21)
+# Timetable times are local Swiss time, +0100 in winter and +0200 in summer
+TIMEZONE = ZoneInfo('Europe/Zurich')
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def _round_ms(value):
+    return round(value, 1) if value is not None else None
+
+class StandinStats:
+    """Request accounting for one load-test session."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.unknown_stations = 0
+        self.by_key = Counter()
+        self.by_station = Counter()
+        self.limits = Counter()
+        self.in_flight = 0
+        self.in_flight_by_key = Counter()
+        self.peak_concurrency = 0
+        self.concurrent_duplicates = 0
+        self.latencies_ms = []
+
+    def begin(self, station_id, date, limit):
+        key = (station_id, date)
+        self.requests += 1
+        self.by_key[key] += 1
+        self.by_station[station_id] += 1
+        self.limits[limit] += 1
+        if self.in_flight_by_key[key]:
+            # Same station and day already being fetched: a shared in-flight request would have covered it
+            self.concurrent_duplicates += 1
+        self.in_flight += 1
+        self.in_flight_by_key[key] += 1
+        self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+        return key
+
+    def end(self, key, started):
+        self.in_flight -= 1
+        self.in_flight_by_key[key] -= 1
+        self.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    def to_dict(self, station_names=None):
+        station_names = station_names or {}
+        unique = len(self.by_key)
+        duplicates_by_station = defaultdict(int)
+        for (station_id, _), count in self.by_key.items():
+            duplicates_by_station[station_id] += count - 1
+        return {
+            'session_started': datetime.datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'duration_s': round(time.time() - self.started, 3),
+            'requests': self.requests,
+            'unique_station_days': unique,
+            'duplicate_requests': self.requests - unique,
+            # Share of requests a per-(station, date) client cache could not have answered
+            'cache_miss_ratio': round(unique / self.requests, 4) if self.requests else None,
+            'amplification': round(self.requests / unique, 3) if unique else None,
+            'peak_concurrency': self.peak_concurrency,
+            'concurrent_duplicates': self.concurrent_duplicates,
+            'injected_errors': self.errors,
+            'injected_timeouts': self.timeouts,
+            'unknown_stations': self.unknown_stations,
+            'latency_ms': {
+                'p50': _round_ms(_percentile(self.latencies_ms, 0.5)),
+                'p95': _round_ms(_percentile(self.latencies_ms, 0.95)),
+                'max': _round_ms(max(self.latencies_ms) if self.latencies_ms else None)
+            },
+            'limits': {str(limit): count for limit, count in sorted(self.limits.items())},
+            'stations': {
+                station_id: {
+                    'name': station_names.get(station_id),
+                    'requests': count,
+                    'duplicates': duplicates_by_station[station_id]
+                }
+                for station_id, count in self.by_station.most_common()
+            }
+        }
+
+class StationboardStandin:
+    """asyncio HTTP server answering stationboard requests from the station list."""
+
+    def __init__(self, table, recordings=None, latency_ms=0.0, jitter_ms=0.0,
+                 error_rate=0.0, timeout_rate=0.0, seed=0):
+        self.stations = {}
+        self.lake_rows = {}
+        for row in range(len(table)):
+            uic_ref = table.uic_refs[row]
+            if uic_ref and uic_ref not in self.stations:
+                self.stations[uic_ref] = table.record(row)
+        for lake_id in range(len(table.lake_names)):
+            rows = table.lake_rows(lake_id)
+            self.lake_rows[lake_id] = [table.record(row) for row in rows if table.uic_refs[row]]
+        self.lake_ids = {table.lake_names[lake_id]: lake_id for lake_id in range(len(table.lake_names))}
+        self.recordings = Path(recordings) if recordings else None
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.rng = random.Random(seed)
+        self.stats = StandinStats()
+
+    def station_names(self):
+        return {station_id: station.name for station_id, station in self.stations.items()}
+
+    def _recorded(self, station_id, date):
+        if self.recordings is None:
+            return None
+        for name in (f"{station_id}_{date}.json", f"{station_id}.json"):
+            path = self.recordings / name
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        return None
+
+    def _synthetic(self, station, date):
+        """Deterministic BAT departures for a station and day."""
+        rng = random.Random(zlib.crc32(f"{station.uic_ref}|{date}".encode('utf-8')))
+        day = datetime.date.fromisoformat(date)
+        others = [s for s in self.lake_rows[self.lake_ids[station.lake]] if s.uic_ref != station.uic_ref] or [station]
+        journeys = []
+        minute = SYNTHETIC_HOURS[0] * 60 + rng.randrange(SYNTHETIC_INTERVAL_MINUTES)
+        number = 0
+        while minute < SYNTHETIC_HOURS[1] * 60:
+            departure = datetime.datetime.combine(day, datetime.time(minute // 60, minute % 60), tzinfo=TIMEZONE)
+            stops = rng.sample(others, min(len(others), rng.randint(1, 3)))
+            departure_stop = self._stop(station, departure, None)
+            pass_list = [departure_stop]
+            arrival = departure
+            for stop in stops:
+                arrival += datetime.timedelta(minutes=rng.randint(5, 20))
+                pass_list.append(self._stop(stop, None, arrival))
+            number += 1
+            journeys.append({
+                'stop': departure_stop,
+                'name': f"{station.uic_ref[-4:]}{number:02d}",
+                'category': 'BAT',
+                'subcategory': None,
+                'categoryCode': None,
+                'number': str(number),
+                'operator': None,
+                'to': stops[-1].name,
+                'passList': pass_list,
+                'capacity1st': None,
+                'capacity2nd': None
+            })
+            minute += SYNTHETIC_INTERVAL_MINUTES
+        return {'station': {'id': station.uic_ref, 'name': station.name}, 'stationboard': journeys}
+
+    @staticmethod
+    def _stop(station, departure, arrival):
+        def stamp(moment):
+            return moment.strftime('%Y-%m-%dT%H:%M:%S%z') if moment else None
+        return {
+            'departure': stamp(departure),
+            'departureTimestamp': int(departure.timestamp()) if departure else None,
+            'arrival': stamp(arrival),
+            'platform': None,
+            'prognosis': {'platform': None, 'departure': None, 'capacity1st': None, 'capacity2nd': None},
+            'station': {
+                'id': station.uic_ref,
+                'name': station.name,
+                'coordinate': {'type': 'WGS84', 'x': station.latitude, 'y': station.longitude}
+            }
+        }
+
+    async def stationboard(self, query):
+        """Return (status, payload) for a stationboard query, injecting latency and errors."""
+        station_id = query.get('id', [''])[0]
+        date = query.get('date', [datetime.datetime.now(TIMEZONE).date().isoformat()])[0]
+        try:
+            limit = int(query.get('limit', [DEFAULT_LIMIT])[0])
+            datetime.date.fromisoformat(date)
+        except ValueError:
+            return 400, {'errors': [{'message': 'invalid limit or date'}]}
+
+        key = self.stats.begin(station_id, date, limit)
+        started = time.perf_counter()
+        try:
+            delay = self.latency_ms + self.rng.uniform(0, self.jitter_ms)
+            roll = self.rng.random()
+            if roll < self.timeout_rate:
+                self.stats.timeouts += 1
+                await asyncio.sleep(TIMEOUT_SECONDS)
+                return 504, {'errors': [{'message': 'injected timeout'}]}
+            await asyncio.sleep(delay / 1000)
+            if roll < self.timeout_rate + self.error_rate:
+                self.stats.errors += 1
+                return 500, {'errors': [{'message': 'injected error'}]}
+
+            payload = self._recorded(station_id, date)
+            if payload is None:
+                station = self.stations.get(station_id)
+                if station is None:
+                    self.stats.unknown_stations += 1
+                    return 200, {'station': None, 'stationboard': []}
+                payload = self._synthetic(station, date)
+            return 200, dict(payload, stationboard=payload.get('stationboard', [])[:limit])
+        finally:
+            self.stats.end(key, started)
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 GET requests on one connection, honouring keep-alive."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                url = urlsplit(target)
+                query = parse_qs(url.query)
+                if method != 'GET':
+                    status, payload = 405, {'errors': [{'message': 'only GET is supported'}]}
+                elif url.path == '/v1/stationboard':
+                    status, payload = await self.stationboard(query)
+                elif url.path == '/stats':
+                    status, payload = 200, self.stats.to_dict(self.station_names())
+                elif url.path == '/stats/reset':
+                    status, payload = 200, self.stats.to_dict(self.station_names())
+                    self.stats = StandinStats()
+                else:
+                    status, payload = 404, {'errors': [{'message': 'not found'}]}
+
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown while a request (e.g. an injected timeout) was held
+            pass
+        finally:
+            writer.close()
+
+async def _fetch(host, port, path):
+    """Minimal GET returning (status, parsed JSON)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+        await writer.drain()
+        raw = await reader.read()
+    finally:
+        writer.close()
+    head, _, body = raw.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+async def drive(host, port, station_ids, days, rounds, concurrency, client_cache, limit):
+    """Simulate a client refreshing its favourite stations.
+
+    Every round requests each station for each day, at most ``concurrency``
+    at a time. With ``client_cache`` successful responses are kept per
+    (station, date) like the apps' departures cache and not fetched again.
+    Requests give up after CLIENT_TIMEOUT_SECONDS like the apps do; failed
+    requests are counted rather than ending the run. Returns the Counter of
+    client-side outcomes.
+    """
+    outcomes = Counter()
+    cache = set()
+    semaphore = asyncio.Semaphore(concurrency)
+    today = datetime.datetime.now(TIMEZONE).date()
+    dates = [(today + datetime.timedelta(days=d)).isoformat() for d in range(days)]
+
+    async def fetch(station_id, date):
+        if client_cache and (station_id, date) in cache:
+            return
+        path = f"/v1/stationboard?id={station_id}&limit={limit}&date={date}"
+        async with semaphore:
+            try:
+                status, _ = await asyncio.wait_for(_fetch(host, port, path), CLIENT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                outcomes['timeouts'] += 1
+                return
+            except (OSError, ValueError, IndexError):
+                # Connection errors and malformed responses
+                outcomes['failures'] += 1
+                return
+        if status == 200:
+            outcomes['ok'] += 1
+            cache.add((station_id, date))
+        else:
+            outcomes['http_errors'] += 1
+
+    for _ in range(rounds):
+        await asyncio.gather(*(fetch(station_id, date) for station_id in station_ids for date in dates))
+    return outcomes
+
+def print_stats(stats):
+    print(f"📊 Requests: {stats['requests']} for {stats['unique_station_days']} station-days "
+          f"(amplification {stats['amplification']}×, cache-miss ratio {stats['cache_miss_ratio']})")
+    print(f"📊 Duplicates: {stats['duplicate_requests']} ({stats['concurrent_duplicates']} while the same request was in flight)")
+    print(f"📊 Peak concurrency: {stats['peak_concurrency']}, injected errors: {stats['injected_errors']}, "
+          f"timeouts: {stats['injected_timeouts']}")
+    busiest = list(stats['stations'].items())[:5]
+    if busiest:
+        print("📊 Busiest stations:")
+        for station_id, info in busiest:
+            print(f"   • {info['name'] or station_id}: {info['requests']} requests, {info['duplicates']} duplicates")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the transport stationboard API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--recordings', type=Path, default=None,
+                        help="Directory with recorded responses named <uic_ref>_<date>.json or <uic_ref>.json")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Base latency added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Random extra latency up to this value")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument('--timeout-rate', type=float, default=0.0,
+                        help=f"Share of requests held for {TIMEOUT_SECONDS:.0f} s, past the apps' timeout")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stats-output', type=Path, default=None,
+                        help="Write the session statistics as JSON to this file on exit")
+    parser.add_argument('--drive', type=int, default=0, metavar='FAVORITES',
+                        help="Instead of serving until interrupted, simulate a client with this many favourites")
+    parser.add_argument('--days', type=int, default=1, help="Days per favourite fetched by --drive")
+    parser.add_argument('--rounds', type=int, default=3, help="Refresh rounds run by --drive")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallel requests made by --drive")
+    parser.add_argument('--no-client-cache', action='store_true',
+                        help="Let --drive refetch every round instead of caching per station and date")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help="limit parameter sent by --drive")
+    return parser.parse_args(argv)
+
+async def run(args):
+    registry = DatasetRegistry(Path(__file__).parent.parent)
+    standin = StationboardStandin(
+        registry.station_table(),
+        recordings=args.recordings,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        seed=args.seed
+    )
+    server = await asyncio.start_server(standin.handle, args.host, args.port)
+    # Stop serving on Ctrl+C or SIGTERM but still report the session
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+    port = server.sockets[0].getsockname()[1]
+    print(f"🚢 Stationboard stand-in for {len(standin.stations)} stations on http://{args.host}:{port}")
+
+    outcomes = None
+    try:
+        async with server:
+            if args.drive:
+                station_ids = random.Random(args.seed).sample(sorted(standin.stations), min(args.drive, len(standin.stations)))
+                outcomes = await drive(args.host, port, station_ids, args.days, args.rounds, args.concurrency,
+                                       not args.no_client_cache, args.limit)
+            else:
+                await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        stats = standin.stats.to_dict(standin.station_names())
+        print()
+        print_stats(stats)
+        if outcomes is not None:
+            stats['client'] = {key: outcomes[key] for key in ('ok', 'http_errors', 'timeouts', 'failures')}
+            print(f"📱 Client: {outcomes['ok']} ok, {outcomes['http_errors']} HTTP errors, "
+                  f"{outcomes['timeouts']} timed out after {CLIENT_TIMEOUT_SECONDS:.0f} s, {outcomes['failures']} failed")
+        if args.stats_output:
+            with open(args.stats_output, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, ensure_ascii=False, indent=2)
+            print(f"\n💾 Statistics written to {args.stats_output}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,134 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import build_station_pack as station_pack  # noqa: E402
+
+
+def _station(name, uic_ref=None, latitude=None, longitude=None):
+    station = {'name': name, 'uic_ref': uic_ref}
+    if latitude is not None:
+        station['coordinates'] = {'latitude': latitude, 'longitude': longitude}
+    return station
+
+
+SAMPLE = {
+    'lakes': [
+        {
+            'name': 'Zürichsee',
+            'operators': ['ZSG'],
+            'stations': [
+                _station('Zürich Bürkliplatz (See)', '8503651', 47.365662, 8.541005),
+                _station('Küsnacht ZH (See)', '8503682', 47.318385, 8.580385),
+                'Rapperswil SG (See)',
+            ]
+        },
+        {'name': 'Ägerisee', 'operators': [], 'stations': []},
+        {
+            'name': 'Lac Léman',
+            'operators': ['CGN', 'SNL'],
+            'stations': [
+                _station('Lausanne-Ouchy', '8501160', 46.5055, 6.6269),
+                # Same name and UIC ref as above; lookups resolve to the first row
+                _station('Lausanne-Ouchy', '8501160', 46.5056, 6.627),
+                _station('Genève-Pâquis', '8587057', -46.2105, -6.1475),
+            ]
+        },
+    ]
+}
+
+
+def _pack(data):
+    return station_pack.StationPack(station_pack.build_station_pack(data))
+
+
+class StationPackRoundTripTest(unittest.TestCase):
+    def test_sample_round_trips(self):
+        pack = _pack(SAMPLE)
+        self.assertEqual(station_pack.verify_station_pack(pack, SAMPLE), [])
+        self.assertEqual(len(pack), 6)
+        self.assertEqual(pack.lake_count, 3)
+
+    def test_string_table_stores_repeated_strings_once(self):
+        data = {'lakes': [{'name': 'A', 'operators': ['X'], 'stations': ['Same', 'Same', 'Same']}]}
+        single = {'lakes': [{'name': 'A', 'operators': ['X'], 'stations': ['Same']}]}
+        self.assertEqual(_pack(data).sections['strings'][1], _pack(single).sections['strings'][1])
+        self.assertEqual([_pack(data).name(row) for row in range(3)], ['Same'] * 3)
+
+    def test_lakes_keep_operators_and_row_ranges(self):
+        pack = _pack(SAMPLE)
+        self.assertEqual(pack.lake(0), {'name': 'Zürichsee', 'operators': ['ZSG'], 'rows': range(0, 3)})
+        self.assertEqual(pack.lake(1), {'name': 'Ägerisee', 'operators': [], 'rows': range(3, 3)})
+        self.assertEqual(pack.lake(2)['operators'], ['CGN', 'SNL'])
+        self.assertEqual(pack.lake(2)['rows'], range(3, 6))
+
+    def test_uic_binary_search(self):
+        pack = _pack(SAMPLE)
+        self.assertEqual(pack.find_by_uic('8503651'), 0)
+        self.assertEqual(pack.find_by_uic('8587057'), 5)
+        self.assertEqual(pack.uic_ref(pack.find_by_uic('8501160')), '8501160')
+        self.assertIsNone(pack.find_by_uic('0000000'))
+        self.assertIsNone(pack.find_by_uic('9999999'))
+        self.assertIsNone(pack.uic_ref(2))
+
+    def test_name_probing(self):
+        pack = _pack(SAMPLE)
+        self.assertEqual(pack.find_by_name('Küsnacht ZH (See)'), 1)
+        self.assertEqual(pack.find_by_name('Lausanne-Ouchy'), 3)
+        self.assertIsNone(pack.find_by_name('Küsnacht'))
+
+    def test_name_probing_resolves_hash_collisions(self):
+        # Enough names that a power-of-two table gets colliding slots
+        names = [f"Station {i}" for i in range(200)]
+        data = {'lakes': [{'name': 'A', 'operators': [], 'stations': names}]}
+        pack = _pack(data)
+        mask = len(pack.name_slots) - 1
+        slots = [station_pack.fnv1a_32(name.encode('utf-8')) & mask for name in names]
+        self.assertLess(len(set(slots)), len(slots))
+        self.assertEqual([pack.find_by_name(name) for name in names], list(range(200)))
+
+    def test_coordinates_and_missing_coordinates(self):
+        pack = _pack(SAMPLE)
+        self.assertEqual(pack.coordinates(0), (47.365662, 8.541005))
+        self.assertEqual(pack.coordinates(5), (-46.2105, -6.1475))
+        self.assertIsNone(pack.coordinates(2))
+
+    def test_excess_precision_is_rounded_not_rejected(self):
+        data = {'lakes': [{'name': 'A', 'operators': [], 'stations': [
+            _station('S', '1', 46.123456789, 7.987654321)
+        ]}]}
+        pack = _pack(data)
+        self.assertEqual(station_pack.verify_station_pack(pack, data), [])
+        self.assertEqual(pack.coordinates(0), (46.1234568, 7.9876543))
+
+    def test_empty_document(self):
+        data = {'lakes': []}
+        pack = _pack(data)
+        self.assertEqual(len(pack), 0)
+        self.assertEqual(station_pack.verify_station_pack(pack, data), [])
+        self.assertIsNone(pack.find_by_name('Anything'))
+        self.assertIsNone(pack.find_by_uic('8500000'))
+
+    def test_verify_reports_differences(self):
+        pack = _pack(SAMPLE)
+        changed = {'lakes': [dict(lake) for lake in SAMPLE['lakes']]}
+        changed['lakes'][0]['stations'] = [_station('Elsewhere', '8503651', 47.365662, 8.541005)] + \
+            SAMPLE['lakes'][0]['stations'][1:]
+        problems = station_pack.verify_station_pack(pack, changed)
+        self.assertTrue(any('Elsewhere' in problem for problem in problems))
+
+    def test_corrupt_pack_is_rejected(self):
+        data = bytearray(station_pack.build_station_pack(SAMPLE))
+        data[-1] ^= 0xFF
+        with self.assertRaisesRegex(ValueError, 'checksum'):
+            station_pack.StationPack(bytes(data))
+        with self.assertRaisesRegex(ValueError, 'truncated'):
+            station_pack.StationPack(bytes(data[:10]))
+        with self.assertRaisesRegex(ValueError, 'Not a station pack'):
+            station_pack.StationPack(b'XXXX' + bytes(data[4:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,284 @@
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import check_stations_consistency as consistency  # noqa: E402
+
+
+def _station(name, uic_ref, latitude, longitude):
+    return {'name': name, 'uic_ref': uic_ref, 'coordinates': {'latitude': latitude, 'longitude': longitude}}
+
+
+REFERENCE = {
+    'lakes': [
+        {
+            'name': 'Zürichsee',
+            'operators': ['ZSG'],
+            'stations': [
+                _station('Zürich Bürkliplatz (See)', '8503651', 47.365662, 8.541005),
+                _station('Küsnacht ZH (See)', '8503682', 47.318385, 8.580385),
+                'Rapperswil SG (See)',
+            ]
+        },
+        {'name': 'Walensee', 'operators': ['SBS'], 'stations': [_station('Weesen', '8503290', 47.1345, 9.0966)]},
+    ]
+}
+
+
+def _copy(document):
+    return json.loads(json.dumps(document))
+
+
+class DiffStationsDataTest(unittest.TestCase):
+    def test_identical_documents(self):
+        diff = consistency.diff_stations_data(REFERENCE, _copy(REFERENCE))
+        self.assertEqual(diff, {'lakes_added': [], 'lakes_removed': [], 'lakes': {}})
+
+    def test_lakes_added_and_removed(self):
+        other = _copy(REFERENCE)
+        other['lakes'][1]['name'] = 'Ägerisee'
+        diff = consistency.diff_stations_data(REFERENCE, other)
+        self.assertEqual(diff['lakes_added'], ['Ägerisee'])
+        self.assertEqual(diff['lakes_removed'], ['Walensee'])
+
+    def test_lake_field_change(self):
+        other = _copy(REFERENCE)
+        other['lakes'][0]['operators'] = ['ZSG', 'SBS']
+        diff = consistency.diff_stations_data(REFERENCE, other)
+        self.assertEqual(diff['lakes']['Zürichsee']['fields_changed'], {'operators': [['ZSG'], ['ZSG', 'SBS']]})
+
+    def test_changed_coordinate_is_matched_by_uic_ref(self):
+        other = _copy(REFERENCE)
+        other['lakes'][0]['stations'][1]['coordinates']['latitude'] = 47.3
+        diff = consistency.diff_stations_data(REFERENCE, other)
+        self.assertEqual(diff['lakes']['Zürichsee'], {
+            'stations_changed': [{'key': 'uic:8503682', 'changes': {'coordinates.latitude': [47.318385, 47.3]}}]
+        })
+
+    def test_renamed_station_is_matched_by_uic_ref(self):
+        other = _copy(REFERENCE)
+        other['lakes'][0]['stations'][0]['name'] = 'Zürich Bürkliplatz'
+        changed = consistency.diff_stations_data(REFERENCE, other)['lakes']['Zürichsee']['stations_changed']
+        self.assertEqual(changed[0]['changes'], {'name': ['Zürich Bürkliplatz (See)', 'Zürich Bürkliplatz']})
+
+    def test_name_only_station_added_and_removed(self):
+        other = _copy(REFERENCE)
+        other['lakes'][0]['stations'][2] = 'Rapperswil (See)'
+        lake_diff = consistency.diff_stations_data(REFERENCE, other)['lakes']['Zürichsee']
+        self.assertEqual(lake_diff['stations_added'], [{'name': 'Rapperswil (See)'}])
+        self.assertEqual(lake_diff['stations_removed'], [{'name': 'Rapperswil SG (See)'}])
+
+    def test_reordering_is_not_a_change(self):
+        other = _copy(REFERENCE)
+        other['lakes'][0]['stations'].reverse()
+        self.assertEqual(consistency.diff_stations_data(REFERENCE, other)['lakes'], {})
+
+
+class CompareStationCopiesTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        self.copies = [Path('a.json'), Path('b.json')]
+
+    def _write(self, copy, text):
+        (self.root / copy).write_text(text, encoding='utf-8')
+
+    def test_identical_copies(self):
+        for copy in self.copies:
+            self._write(copy, json.dumps(REFERENCE))
+        report = consistency.compare_station_copies(self.root, self.copies)
+        self.assertTrue(report['identical'])
+
+    def test_formatting_only_difference(self):
+        self._write(self.copies[0], json.dumps(REFERENCE))
+        self._write(self.copies[1], json.dumps(REFERENCE, indent=2))
+        report = consistency.compare_station_copies(self.root, self.copies)
+        self.assertFalse(report['identical'])
+        self.assertEqual(report['copies']['b.json']['diff']['lakes'], {})
+
+    def test_unreadable_copy_is_reported(self):
+        self._write(self.copies[0], json.dumps(REFERENCE))
+        self._write(self.copies[1], '{broken')
+        report = consistency.compare_station_copies(self.root, self.copies)
+        self.assertFalse(report['identical'])
+        self.assertIn('error', report['copies']['b.json'])
+
+    def test_missing_copy_is_reported(self):
+        self._write(self.copies[0], json.dumps(REFERENCE))
+        report = consistency.compare_station_copies(self.root, self.copies)
+        self.assertTrue(report['copies']['b.json']['missing'])
+
+
+def _period(name, period_type, start_date, end_date):
+    return {'name': name, 'type': period_type, 'start_date': start_date, 'end_date': end_date}
+
+
+def _schedule(*lakes):
+    return {'lakes': [{'name': name, 'operator': operator, 'schedule_periods': periods}
+                      for name, operator, periods in lakes]}
+
+
+class PeriodIntervalIndexTest(unittest.TestCase):
+    def test_covering(self):
+        index = consistency.PeriodIntervalIndex([(1, 10, 0), (5, 20, 1), (30, 40, 2)])
+        self.assertEqual(index.covering(0), [])
+        self.assertEqual(index.covering(1), [0])
+        self.assertEqual(index.covering(7), [0, 1])
+        self.assertEqual(index.covering(20), [1])
+        self.assertEqual(index.covering(25), [])
+        self.assertEqual(index.covering(40), [2])
+        self.assertEqual(index.covering(41), [])
+
+    def test_covering_behind_a_long_period(self):
+        # A long early period must be found past shorter later ones
+        index = consistency.PeriodIntervalIndex([(1, 100, 0), (10, 11, 1), (20, 21, 2)])
+        self.assertEqual(index.covering(50), [0])
+
+    def test_overlaps(self):
+        index = consistency.PeriodIntervalIndex([(1, 10, 0), (10, 20, 1), (21, 30, 2), (25, 26, 3)])
+        self.assertEqual(sorted(index.overlaps()), [(0, 1), (2, 3)])
+
+    def test_gaps(self):
+        index = consistency.PeriodIntervalIndex([(1, 10, 0), (11, 20, 1), (25, 30, 2), (2, 3, 3)])
+        self.assertEqual(index.gaps(), [(21, 24)])
+
+    def test_empty(self):
+        index = consistency.PeriodIntervalIndex([])
+        self.assertEqual(index.covering(1), [])
+        self.assertEqual(index.overlaps(), [])
+        self.assertEqual(index.gaps(), [])
+
+
+class ScheduleValidationTest(unittest.TestCase):
+    def test_valid_schedule(self):
+        data = _schedule(('L', 'X', [
+            _period('Sommer', 'summer', '2025-05-01', '2025-09-30'),
+            _period('Herbst', 'autumn', '2025-10-01', '2025-10-19'),
+        ]))
+        errors, warnings, indexes = consistency.validate_schedule_periods(data, ['L'])
+        self.assertEqual((errors, warnings), ([], []))
+        self.assertIn(('L', 'X'), indexes)
+
+    def test_overlap_is_an_error(self):
+        data = _schedule(('L', 'X', [
+            _period('Sommer', 'summer', '2025-05-01', '2025-10-01'),
+            _period('Herbst', 'autumn', '2025-10-01', '2025-10-19'),
+        ]))
+        errors, _, _ = consistency.validate_schedule_periods(data, ['L'])
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Sommer', errors[0])
+        self.assertIn('overlaps', errors[0])
+
+    def test_gap_is_a_warning(self):
+        data = _schedule(('L', 'X', [
+            _period('Sommer', 'summer', '2025-05-01', '2025-09-30'),
+            _period('Herbst', 'autumn', '2025-10-05', '2025-10-19'),
+        ]))
+        errors, warnings, _ = consistency.validate_schedule_periods(data, ['L'])
+        self.assertEqual(errors, [])
+        self.assertEqual(warnings, ['L (X): no period from 2025-10-01 to 2025-10-04 (4 days)'])
+
+    def test_invalid_periods(self):
+        data = _schedule(('Unknown', 'X', [
+            _period('Kaputt', 'summer', '2025-13-01', '2025-09-30'),
+            _period('Rückwärts', 'autumn', '2025-10-19', '2025-10-01'),
+            _period('Monsun', 'monsoon', '2025-11-01', '2025-11-30'),
+        ]))
+        errors, _, _ = consistency.validate_schedule_periods(data, ['L'])
+        self.assertEqual(len(errors), 4)
+        self.assertIn('lake not found in stations.json', errors[0])
+
+    def test_first_duplicate_entry_is_kept(self):
+        data = _schedule(
+            ('L', 'X', [_period('Sommer', 'summer', '2025-05-01', '2025-09-30')]),
+            ('L', 'X', [_period('Winter', 'winter', '2025-10-01', '2026-03-31')]),
+        )
+        _, warnings, indexes = consistency.validate_schedule_periods(data, ['L'])
+        self.assertEqual(len(warnings), 1)
+        lookup = consistency.build_schedule_lookup(indexes)
+        self.assertEqual(lookup['lakes']['L']['periods'], [{'name': 'Sommer', 'type': 'summer'}])
+
+    def test_lookup_days(self):
+        data = _schedule(
+            ('A', 'X', [
+                _period('Frühling', 'spring', '2025-04-01', '2025-04-02'),
+                _period('Sommer', 'summer', '2025-04-05', '2025-04-06'),
+            ]),
+            ('B', 'Y', [_period('Sommer', 'summer', '2025-04-03', '2025-04-03')]),
+        )
+        _, _, indexes = consistency.validate_schedule_periods(data, ['A', 'B'])
+        lookup = consistency.build_schedule_lookup(indexes)
+        self.assertEqual(lookup['start_date'], '2025-04-01')
+        self.assertEqual(lookup['day_count'], 6)
+        self.assertEqual(lookup['lakes']['A']['days'], '00..11')
+        self.assertEqual(lookup['lakes']['B']['days'], '..0...')
+
+
+class DatasetIntegrityTest(unittest.TestCase):
+    DATASETS = {
+        'stations': {'lakes': [{'name': 'Zürichsee', 'operators': ['ZSG'], 'stations': []}]},
+        'alplakes_mapping_app': {'Zürichsee': 'upperzurich'},
+        'alplakes_mapping_api': {'mapping': {'Zürichsee': {'alplakes_1d': 'upperzurich'}}},
+        'bafu_lake_stations': {'lakes': [{'name': 'Zürichsee', 'stations': [{'id': '2209'}]}]},
+        'bafu_lake_forecast': {'lakes_with_forecast': [{'name': 'Zürichsee', 'station_id': '2209'}]},
+        'lake_water_levels': {'lakes': [{'name': 'Zürichsee', 'averageLevel': 405.94}]},
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        for name, document in self.DATASETS.items():
+            self._write(name, json.dumps(document))
+
+    def _write(self, name, text):
+        path = self.root / consistency.DATASETS[name]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+    def _check(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            passed = consistency.check_dataset_integrity(consistency.DatasetRegistry(self.root))
+        return passed, output.getvalue()
+
+    def test_consistent_datasets(self):
+        passed, output = self._check()
+        self.assertTrue(passed, output)
+
+    def test_missing_water_level(self):
+        self._write('lake_water_levels', json.dumps({'lakes': [{'name': 'Genfersee', 'averageLevel': 372.05}]}))
+        passed, output = self._check()
+        self.assertFalse(passed)
+        self.assertIn('Zürichsee: no average water level', output)
+
+    def test_malformed_dataset_is_reported(self):
+        self._write('bafu_lake_forecast', '{broken')
+        passed, output = self._check()
+        self.assertFalse(passed)
+        self.assertIn(f"{consistency.DATASETS['bafu_lake_forecast']}: unreadable", output)
+
+    def test_reshaped_dataset_is_reported(self):
+        self._write('alplakes_mapping_api', json.dumps({'lakes': {}}))
+        passed, output = self._check()
+        self.assertFalse(passed)
+        self.assertIn("unexpected layout (missing key 'mapping')", output)
+
+    def test_copies_are_read_once(self):
+        registry = consistency.DatasetRegistry(self.root)
+        copies = [consistency.DATASETS['stations']]
+        with contextlib.redirect_stdout(io.StringIO()):
+            consistency.compare_station_copies(self.root, copies, registry=registry)
+            registry.station_table()
+        self.assertEqual(registry.bytes_read, (self.root / copies[0]).stat().st_size)
+
+
+if __name__ == '__main__':
+    unittest.main()